@@ -6,25 +6,86 @@ A dice function takes no arguments and returns a number from 1 to n
 Types of dice:
 
  -  Dice can be fair, meaning that they produce each possible outcome with equal
-    probability. Examples: four_sided, six_sided
+    probability. Examples: four_sided, six_sided.  Fair dice have a sides
+    attribute, the number of sides n, a roll_many method that returns a list
+    of outcomes, and a seed method.
 
  -  For testing functions that use dice, deterministic test dice always cycle
     through a fixed sequence of values that are passed as arguments to the
     make_test_dice function.
 """
 
-from random import randint
+import random
 
-def make_fair_dice(sides):
-    """Return a die that returns 1 to SIDES with equal chance."""
+BLOCK_SIZE = 4096 # Outcomes drawn at once by fair dice
+
+def make_fair_dice(sides, seed=None):
+    """Return a die that returns 1 to SIDES with equal chance.
+
+    Each die has its own random number generator, seeded by SEED, and draws
+    outcomes in blocks of about BLOCK_SIZE.  A die's seed method restarts its
+    sequence of outcomes, and its roll_many method returns a list of the next
+    K outcomes, the same ones that K calls would return.
+
+    >>> dice = make_fair_dice(6, seed=61)
+    >>> first = [dice() for _ in range(5)]
+    >>> dice.seed(61)
+    >>> dice.roll_many(5) == first, all(1 <= d <= 6 for d in first)
+    (True, True)
+    >>> sorted(set(make_fair_dice(4).roll_many(10000)))
+    [1, 2, 3, 4]
+    """
     assert type(sides) == int and sides >= 1, 'Illegal value for sides'
+    rng = random.Random(seed)
+    limit = 256 - 256 % sides # Bytes below limit give uniform outcomes
+    outcomes = []             # Outcomes not yet rolled, the next one last
+
+    def refill():
+        if sides > 256:
+            outcomes.extend(rng.choices(range(1, sides + 1), k=BLOCK_SIZE))
+        else:
+            data = rng.getrandbits(8 * BLOCK_SIZE).to_bytes(BLOCK_SIZE, 'little')
+            outcomes.extend(b % sides + 1 for b in data if b < limit)
+
     def dice():
-        return randint(1,sides)
+        if not outcomes:
+            refill()
+        return outcomes.pop()
+
+    def roll_many(k):
+        rolled = []
+        while len(rolled) < k:
+            if not outcomes:
+                refill()
+            take = min(k - len(rolled), len(outcomes))
+            rolled.extend(reversed(outcomes[-take:]))
+            del outcomes[-take:]
+        return rolled
+
+    def seed(seed=None):
+        rng.seed(seed)
+        outcomes.clear()
+
+    dice.sides = sides
+    dice.roll_many = roll_many
+    dice.seed = seed
     return dice
 
 four_sided = make_fair_dice(4)
 six_sided = make_fair_dice(6)
 
+def seed_dice(seed=None):
+    """Seed four_sided and six_sided so that their outcomes are reproducible.
+
+    >>> seed_dice(1)
+    >>> rolls = six_sided.roll_many(3), four_sided.roll_many(3)
+    >>> seed_dice(1)
+    >>> rolls == (six_sided.roll_many(3), four_sided.roll_many(3))
+    True
+    """
+    four_sided.seed(seed)
+    six_sided.seed(None if seed is None else seed + 1)
+
 def make_test_dice(*outcomes):
     """Return a die that cycles deterministically through OUTCOMES.
 
@@ -1,6 +1,7 @@
 """The Game of Hog."""
 
 from dice import four_sided, six_sided, make_test_dice
+from math import sqrt
 from ucb import main, trace, log_current_line, interact
 
 GOAL_SCORE = 100 # The goal of Hog is to score 100 points.
@@ -175,28 +176,74 @@ def make_averaged(fn, num_samples=1000):
         return average_value
     return average
 
+def make_adaptive_averaged(fn, width=0.02, z=1.96, min_samples=100,
+                           max_samples=100000):
+    """Return a function that calls FN until the confidence interval of its
+    average value is narrower than WIDTH, and returns the average value, its
+    standard error, and the number of samples taken.
+
+    The interval is the average plus or minus Z standard errors (95% by
+    default).  At least MIN_SAMPLES (and at least two, to estimate the error)
+    and at most MAX_SAMPLES samples are taken.
+    The running average and variance are updated with Welford's method.
+
+    >>> make_adaptive_averaged(make_test_dice(3))()
+    (3.0, 0.0, 100)
+    >>> average, error, samples = make_adaptive_averaged(make_test_dice(1, 5), 1)()
+    >>> average, round(error, 3), samples
+    (3.0, 0.201, 100)
+    >>> make_adaptive_averaged(make_test_dice(4), min_samples=1)()
+    (4.0, 0.0, 2)
+
+    Clearly different strategies are told apart in fewer games than close ones.
+
+    >>> from dice import seed_dice
+    >>> seed_dice(0)
+    >>> adaptive_winner = make_adaptive_averaged(winner, width=0.1)
+    >>> clear = adaptive_winner(always_roll(1), always_roll(6))
+    >>> close = adaptive_winner(always_roll(5), always_roll(6))
+    >>> clear[0] > 0.9, clear[2] < 200, close[2] > 300
+    (True, True, True)
+    """
+    def average(*args):
+        samples, mean, squares = 0, 0.0, 0.0
+        while samples < max_samples:
+            value = fn(*args)
+            samples += 1
+            delta = value - mean
+            mean += delta / samples
+            squares += delta * (value - mean)
+            if samples >= max(min_samples, 2):
+                error = sqrt(squares / (samples - 1) / samples)
+                if 2 * z * error < width:
+                    break
+        error = sqrt(squares / (samples - 1) / samples) if samples > 1 else 0.0
+        return mean, error, samples
+    return average
+
 def max_scoring_num_rolls(dice=six_sided):
     """Return the number of dice (1 to 10) that gives the highest average turn
     score by calling roll_dice with the provided DICE.  Assume that dice always
     return positive outcomes.
 
+    The average turn scores of fair dice, which have a sides attribute, are
+    computed exactly by hog_dist.  Other dice are sampled.
+
     >>> dice = make_test_dice(3)
     >>> max_scoring_num_rolls(dice)
     10
+    >>> max_scoring_num_rolls(six_sided), max_scoring_num_rolls(four_sided)
+    (6, 4)
     """
-    n = 1
-    save_n = 1
-    save_x = 0
-    while n<10:
-        x = make_averaged(roll_dice,10000)(n, dice)
-        if save_x==x:
-            n+=1
-            x = make_averaged(roll_dice,10000)(n, dice)
-        if x < make_averaged(roll_dice,10000)(n+1, dice):
-            save_x = make_averaged(roll_dice,10000)(n+1, dice)
-            save_n = n+1 
-        n+=1
-    return save_n
+    if hasattr(dice, 'sides'):
+        from hog_dist import expectation, roll_dice_pmf
+        def average_score(n):
+            return expectation(roll_dice_pmf(n, dice.sides))
+    else:
+        def average_score(n):
+            return make_averaged(roll_dice, 10000)(n, dice)
+    averages = [average_score(n) for n in range(1, 11)]
+    return averages.index(max(averages)) + 1
 
 def winner(strategy0, strategy1):
     """Return 0 if strategy0 wins against strategy1, and 1 otherwise."""
@@ -213,7 +260,9 @@ def average_win_rate(strategy, baseline=always_roll(5)):
     return (win_rate_as_player_0 + win_rate_as_player_1) / 2 # Average results
 
 def run_experiments():
-    """Run a series of strategy experiments and report results."""
+    """Run a series of strategy experiments and report results.  Win rates
+    are computed exactly by hog_exact rather than by simulating games."""
+    from hog_exact import exact_win_rate
     if True: # Change to False when done finding max_scoring_num_rolls
         six_sided_max = max_scoring_num_rolls(six_sided)
         print('Max scoring num rolls for six-sided dice:', six_sided_max)
@@ -221,16 +270,16 @@ def run_experiments():
         print('Max scoring num rolls for four-sided dice:', four_sided_max)
 
     if False: # Change to True to test always_roll(8)
-        print('always_roll(8) win rate:', average_win_rate(always_roll(8)))
+        print('always_roll(8) win rate:', exact_win_rate(always_roll(8)))
 
     if False: # Change to True to test bacon_strategy
-        print('bacon_strategy win rate:', average_win_rate(bacon_strategy))
+        print('bacon_strategy win rate:', exact_win_rate(bacon_strategy))
 
     if False: # Change to True to test swap_strategy
-        print('swap_strategy win rate:', average_win_rate(swap_strategy))
+        print('swap_strategy win rate:', exact_win_rate(swap_strategy))
 
     if True: # Change to True to test final_strategy
-        print('final_strategy win rate:', average_win_rate(final_strategy))
+        print('final_strategy win rate:', exact_win_rate(final_strategy))
 
     "*** You may add additional experiments as you wish ***"
 
@@ -0,0 +1,165 @@
+"""Simulate many games of Hog at once.
+
+play_many plays N games in lockstep.  Each array operation advances every
+game that is still in progress by one turn: the number of dice for each game
+is looked up in a table of the strategy's choices, and the rules of
+take_turn, select_dice, and play are applied to whole arrays of scores.
+
+Rather than rolling each die, the points scored by rolling dice are drawn
+directly from their exact distribution (see hog_dist) with the alias method,
+so each turn of each game takes a single uniform random number and a few
+table lookups.
+
+NumPy is optional.  Without it, play_many falls back to calling play once per
+game, which gives the same results far more slowly.
+"""
+
+from hog import GOAL_SCORE, four_sided, play, select_dice
+from hog_compile import compile_strategy
+from hog_dist import roll_dice_pmf
+from hog_rules import STANDARD, Rules
+from ucb import main
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAX_ROLLS = 10
+
+def alias_table(pmf, size):
+    """Return lists PROBABILITY, FIRST, and SECOND of length SIZE for drawing
+    from the distribution PMF with the alias method: for u uniform on [0, 1)
+    and j = int(u * SIZE), the outcome is FIRST[j] if u * SIZE - j is less
+    than PROBABILITY[j], and SECOND[j] otherwise.
+
+    >>> alias_table(((1, 0.25), (2, 0.75)), 2)
+    ([0.5, 1.0], [1, 2], [2, 2])
+    """
+    scaled = [p * size for _, p in pmf] + [0.0] * (size - len(pmf))
+    first = [outcome for outcome, _ in pmf] + [0] * (size - len(pmf))
+    second = list(first)
+    probability = [1.0] * size
+    small = [j for j in range(size) if scaled[j] < 1]
+    large = [j for j in range(size) if scaled[j] >= 1]
+    while small and large:
+        j, k = small.pop(), large.pop()
+        probability[j], second[j] = scaled[j], first[k]
+        scaled[k] -= 1 - scaled[j]
+        (small if scaled[k] < 1 else large).append(k)
+    return probability, first, second
+
+def turn_table(sides=(6, 4), max_rolls=MAX_ROLLS):
+    """Return the number of entries per row and flat alias tables (see
+    alias_table) for rolling each number of dice from 0 to MAX_ROLLS with
+    dice of each of SIDES.  Rolling N dice of the Kth kind of dice is row
+    K * (MAX_ROLLS + 1) + N.  Row 0 is a placeholder for Free bacon."""
+    pmfs = [roll_dice_pmf(num_rolls, s) if num_rolls else ((0, 1.0),)
+            for s in sides for num_rolls in range(max_rolls + 1)]
+    size = max(len(pmf) for pmf in pmfs)
+    tables = [alias_table(pmf, size) for pmf in pmfs]
+    probability, first, second = (np.array([x for t in tables for x in t[i]])
+                                  for i in range(3))
+    return size, probability, first, second
+
+def play_many(strategy0, strategy1, n, goal=GOAL_SCORE, seed=None, rules=None):
+    """Play N games of STRATEGY0 against STRATEGY1, each starting from 0 to 0,
+    and return the final scores of player 0, the final scores of player 1,
+    and the winner of each game (0 or 1, as returned by winner).  With NumPy,
+    these are arrays, and the dice are drawn from a generator seeded by SEED.
+    Games are played to GOAL under the standard rules, or under RULES (see
+    hog_rules) if given.
+
+    >>> from hog import always_roll
+    >>> score0, score1, winners = play_many(always_roll(5), always_roll(5), 10)
+    >>> len(winners), all(max(s0, s1) >= GOAL_SCORE for s0, s1 in zip(score0, score1))
+    (10, True)
+
+    Goals past 100 are played with Free bacon for three-digit scores, as in
+    hog_rules.
+
+    >>> score0, score1, winners = play_many(always_roll(0), always_roll(6), 10,
+    ...                                     goal=150)
+    >>> all(max(s0, s1) >= 150 for s0, s1 in zip(score0, score1))
+    True
+    """
+    if rules is not None:
+        goal = rules.goal
+    if np is None:
+        if rules is None and goal <= 100:
+            scores = [play(strategy0, strategy1, goal=goal) for _ in range(n)]
+        elif rules is None:
+            # take_turn only scores Free bacon against scores below 100
+            scores = [Rules(goal=goal).play(strategy0, strategy1)
+                      for _ in range(n)]
+        else:
+            scores = [rules.play(strategy0, strategy1) for _ in range(n)]
+        score0 = [s0 for s0, _ in scores]
+        score1 = [s1 for _, s1 in scores]
+        return score0, score1, [0 if s0 > s1 else 1 for s0, s1 in scores]
+
+    rng = np.random.default_rng(seed)
+    tables = [np.frombuffer(compile_strategy(s, goal).table, dtype=np.uint8)
+              for s in (strategy0, strategy1)]
+    final_scores = np.zeros((2, n), dtype=np.int64)
+    games = np.arange(n)       # The games in progress
+    score = np.zeros(n, dtype=np.int64)
+    opponent_score = np.zeros(n, dtype=np.int64)
+    if rules is None:
+        size, probability, first, second = turn_table()
+        # Free bacon points for each opponent score, as in take_turn
+        bacon = np.array([STANDARD.free_bacon_points(s) for s in range(goal)])
+        # Rows of the turn table for four-sided dice by total score (Hog wild)
+        wild = np.array([MAX_ROLLS + 1 if select_dice(total, 0) is four_sided else 0
+                         for total in range(3 * goal)])
+        swine_swap = True
+    else:
+        size, probability, first, second = turn_table(
+            (rules.sides, rules.wild_sides), rules.max_rolls)
+        bacon = np.array([rules.free_bacon_points(s) if rules.free_bacon else 0
+                          for s in range(goal)])
+        wild = np.array([rules.max_rolls + 1
+                         if rules.dice_sides(total, 0) == rules.wild_sides else 0
+                         for total in range(3 * goal)])
+        swine_swap = rules.swine_swap
+    who = 0
+    while games.size:
+        num_rolls = tables[who][score * goal + opponent_score]
+
+        row = wild[score + opponent_score] + num_rolls
+        u = rng.random(games.size) * size
+        j = u.astype(np.int64)
+        entry = row * size + j
+        rolled = np.where(u - j < probability[entry], first[entry], second[entry])
+        points = np.where(num_rolls == 0, bacon[opponent_score], rolled)
+
+        # Swine swap, as in play
+        score = score + points
+        if swine_swap:
+            swap = (score == 2 * opponent_score) | (opponent_score == 2 * score)
+            score, opponent_score = (np.where(swap, opponent_score, score),
+                                     np.where(swap, score, opponent_score))
+
+        # The other player rolls next, unless the game is over
+        score, opponent_score, who = opponent_score, score, 1 - who
+        over = opponent_score >= goal
+        if over.any():
+            final_scores[who, games[over]] = score[over]
+            final_scores[1 - who, games[over]] = opponent_score[over]
+            playing = ~over
+            games = games[playing]
+            score, opponent_score = score[playing], opponent_score[playing]
+    score0, score1 = final_scores
+    return score0, score1, np.where(score0 > score1, 0, 1)
+
+@main
+def run(n=100000):
+    """Report how quickly play_many plays games of final_strategy."""
+    import time
+    from hog import always_roll, final_strategy
+    n = int(n)
+    start = time.perf_counter()
+    _, _, winners = play_many(final_strategy, always_roll(5), n)
+    elapsed = time.perf_counter() - start
+    print('{0} games in {1:.2f} s ({2:.0f} games/s); player 0 won {3:.4f}'.format(
+        n, elapsed, n / elapsed, 1 - sum(winners) / n))
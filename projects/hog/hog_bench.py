@@ -0,0 +1,162 @@
+"""Benchmarks of the Hog simulator, dice, and solvers.
+
+Each benchmark repeats a unit of work, such as a game or a roll, a fixed
+number of times and reports the best rate of several trials, in units per
+second.  Results are written as JSON so that they can be kept and compared:
+
+    python3 hog_bench.py -o before.json
+    (change hog.py or dice.py)
+    python3 hog_bench.py -b before.json
+
+The second command fails with exit status 1 if any benchmark is slower than
+in before.json by more than the threshold (20% by default).
+"""
+
+import json
+import platform
+import sys
+import time
+from dice import make_fair_dice, make_test_dice, six_sided
+from hog import always_roll, final_strategy, max_scoring_num_rolls, play, roll_dice
+from ucb import main
+
+THRESHOLD = 0.2 # Fraction by which a rate may fall before it is a regression
+
+def play_games(strategy0, strategy1):
+    def work(n):
+        for _ in range(n):
+            play(strategy0, strategy1)
+    return work
+
+def roll(dice):
+    def work(n):
+        for _ in range(n):
+            dice()
+    return work
+
+def roll_many(n):
+    make_fair_dice(6, seed=0).roll_many(n)
+
+def solve_exact(n):
+    from hog_exact import win_probability
+    for _ in range(n):
+        win_probability(final_strategy, always_roll(5))
+
+def exact_max_scoring(n):
+    for _ in range(n):
+        max_scoring_num_rolls(six_sided)
+
+def sampled_max_scoring(n):
+    for _ in range(n):
+        max_scoring_num_rolls(make_test_dice(2, 3, 4, 5, 6, 1))
+
+def benchmarks():
+    """Return a list of (name, work, size, unit) for each benchmark, where
+    work(size) does size units of work."""
+    from hog_compile import compile_strategy
+    compiled = compile_strategy(final_strategy)
+    suite = [('play always_roll({0})'.format(n),
+              play_games(always_roll(n), always_roll(n)), 2000, 'games')
+             for n in (1, 5, 10)]
+    return suite + [
+        ('play final_strategy', play_games(final_strategy, always_roll(5)),
+         2000, 'games'),
+        ('play compiled final_strategy', play_games(compiled, always_roll(5)),
+         2000, 'games'),
+        ('roll six_sided', roll(six_sided), 200000, 'rolls'),
+        ('roll_many six_sided', roll_many, 1000000, 'rolls'),
+        ('roll make_test_dice', roll(make_test_dice(1, 2, 3)), 200000, 'rolls'),
+        ('roll_dice 5 six_sided', lambda n: [roll_dice(5) for _ in range(n)],
+         50000, 'turns'),
+        ('exact win_probability', solve_exact, 2, 'solves'),
+        ('max_scoring_num_rolls exact', exact_max_scoring, 1000, 'calls'),
+        ('max_scoring_num_rolls sampled', sampled_max_scoring, 1, 'calls'),
+    ]
+
+def measure(work, size, trials=3):
+    """Return the best rate, in units per second, of TRIALS calls to
+    work(SIZE).
+
+    >>> measure(lambda n: None, 10) > 0
+    True
+    """
+    best = float('inf')
+    for _ in range(trials):
+        start = time.perf_counter()
+        work(size)
+        best = min(best, time.perf_counter() - start)
+    return size / max(best, 1e-9)
+
+def run_benchmarks(scale=1.0, trials=3, names=None):
+    """Return a dictionary of results, with the rate and unit of each
+    benchmark named in NAMES (all by default), each run on SCALE times its
+    usual amount of work."""
+    results = {}
+    for name, work, size, unit in benchmarks():
+        if names is None or name in names:
+            size = max(1, int(size * scale))
+            rate = measure(work, size, trials)
+            results[name] = {'rate': rate, 'unit': unit + '/s'}
+    return {'python': platform.python_version(), 'results': results}
+
+def regressions(results, baseline, threshold=THRESHOLD):
+    """Return a list of (name, baseline rate, rate) for each benchmark whose
+    rate in RESULTS is lower than its rate in BASELINE by more than the
+    fraction THRESHOLD.  Benchmarks missing from either are skipped.
+
+    >>> before = {'results': {'a': {'rate': 100.0}, 'b': {'rate': 100.0}}}
+    >>> after = {'results': {'a': {'rate': 85.0}, 'b': {'rate': 75.0}}}
+    >>> regressions(after, before)
+    [('b', 100.0, 75.0)]
+    """
+    slower = []
+    for name, result in sorted(results['results'].items()):
+        if name in baseline['results']:
+            before = baseline['results'][name]['rate']
+            if result['rate'] < before * (1 - threshold):
+                slower.append((name, before, result['rate']))
+    return slower
+
+def format_results(results, baseline=None):
+    """Return a table of RESULTS, with the change from BASELINE if given."""
+    lines = []
+    for name, result in results['results'].items():
+        line = '{0:<32} {1:>14,.0f} {2}'.format(name, result['rate'],
+                                                 result['unit'])
+        if baseline and name in baseline['results']:
+            before = baseline['results'][name]['rate']
+            line += '  ({0:+.1%})'.format(result['rate'] / before - 1)
+        lines.append(line)
+    return '\n'.join(lines)
+
+@main
+def run(*args):
+    """Run the benchmarks, optionally saving them or comparing them to a
+    baseline."""
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark Hog')
+    parser.add_argument('-o', '--output', help='write results to a JSON file')
+    parser.add_argument('-b', '--baseline', help='compare to a JSON file')
+    parser.add_argument('-t', '--threshold', type=float, default=THRESHOLD,
+                        help='largest allowed slowdown, as a fraction')
+    parser.add_argument('-s', '--scale', type=float, default=1.0,
+                        help='multiply the work of each benchmark')
+    parser.add_argument('-k', '--only', action='append', metavar='NAME',
+                        help='run only the named benchmark (repeatable)')
+    args = parser.parse_args()
+    results = run_benchmarks(args.scale, names=args.only)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print(format_results(results, baseline))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if baseline:
+        slower = regressions(results, baseline, args.threshold)
+        for name, before, after in slower:
+            print('Regression: {0} fell from {1:,.0f} to {2:,.0f}'.format(
+                name, before, after))
+        if slower:
+            sys.exit(1)
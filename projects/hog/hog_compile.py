@@ -0,0 +1,173 @@
+"""Compile Hog strategies into tables of decisions.
+
+A strategy is a pure function of the two scores, so it can be evaluated once
+in every state a game can reach and replaced by a table lookup.  The table of
+a CompiledStrategy is a bytes object indexed by score * goal + opponent_score,
+with rows for scores up to twice the goal (a Swine swap can give a player who
+has not yet rolled a score past the goal) and columns for opponent scores
+below the goal.  This is the layout of hog_optimal's tables, so solved and
+compiled strategies can be compared, saved, and loaded alike.
+
+Code that evaluates a strategy in many states, such as hog_batch and
+hog_exact, reads the table of a CompiledStrategy directly instead of calling
+it.
+"""
+
+import hashlib
+import os
+from hog import GOAL_SCORE, final_strategy
+from ucb import main
+
+class CompiledStrategy:
+    """A strategy that looks up the number of dice to roll in TABLE.
+
+    >>> from hog import always_roll
+    >>> strategy = compile_strategy(always_roll(4), goal=10)
+    >>> strategy(3, 7), len(strategy.table)
+    (4, 200)
+    >>> strategy == compile_strategy(always_roll(4), goal=10)
+    True
+    """
+
+    def __init__(self, table, goal=GOAL_SCORE, name='compiled_strategy'):
+        assert len(table) == 2 * goal * goal, 'Table does not match the goal'
+        self.table = bytes(table)
+        self.goal = goal
+        self.__name__ = name
+
+    def __call__(self, score, opponent_score):
+        return self.table[score * self.goal + opponent_score]
+
+    def __eq__(self, other):
+        if not isinstance(other, CompiledStrategy):
+            return NotImplemented
+        return self.goal == other.goal and self.table == other.table
+
+    def __hash__(self):
+        return hash((self.goal, self.table))
+
+    def __repr__(self):
+        return '<CompiledStrategy {0} for goal {1}>'.format(self.__name__,
+                                                            self.goal)
+
+    def digest(self):
+        """Return a hexadecimal digest of the goal and table of this strategy,
+        which identifies its choices independently of its name.
+
+        >>> from hog import always_roll
+        >>> a = compile_strategy(always_roll(4), goal=10, name='a')
+        >>> a.digest() == compile_strategy(always_roll(4), 10, 'b').digest()
+        True
+        >>> a.digest() == compile_strategy(always_roll(4), 20).digest()
+        False
+        """
+        return hashlib.sha1(str(self.goal).encode() + b':' + self.table).hexdigest()
+
+    def diff(self, other):
+        """Return a list of (score, opponent_score, rolls, other_rolls) for
+        each state in which this strategy and OTHER roll different numbers of
+        dice.  OTHER may be a strategy function, which is compiled first.
+
+        >>> from hog import always_roll
+        >>> bacon = compile_strategy(lambda s, o: 0 if o == 3 else 5, goal=4)
+        >>> bacon.diff(always_roll(5))[:2]
+        [(0, 3, 0, 5), (1, 3, 0, 5)]
+        """
+        other = compile_strategy(other, self.goal)
+        return [(index // self.goal, index % self.goal, a, b)
+                for index, (a, b) in enumerate(zip(self.table, other.table))
+                if a != b]
+
+    def diff_report(self, other, limit=10):
+        """Return a summary of the states in which this strategy and OTHER
+        differ, listing at most LIMIT of them.
+
+        >>> from hog import always_roll
+        >>> bacon = compile_strategy(lambda s, o: 0 if o == 3 else 5, goal=4,
+        ...                          name='bacon')
+        >>> roll5 = compile_strategy(always_roll(5), goal=4, name='roll5')
+        >>> print(bacon.diff_report(roll5, limit=2))
+        bacon and roll5 differ in 8 of 32 states
+          score  opponent  bacon  roll5
+              0         3      0      5
+              1         3      0      5
+          ... 6 more
+        """
+        other = compile_strategy(other, self.goal)
+        differences = self.diff(other)
+        lines = ['{0} and {1} differ in {2} of {3} states'.format(
+            self.__name__, other.__name__, len(differences), len(self.table))]
+        if differences:
+            names = (self.__name__, other.__name__)
+            lines.append('  score  opponent  {0}  {1}'.format(*names))
+            for score, opponent_score, a, b in differences[:limit]:
+                lines.append('  {0:>5}  {1:>8}  {2:>{4}}  {3:>{5}}'.format(
+                    score, opponent_score, a, b, *map(len, names)))
+            if len(differences) > limit:
+                lines.append('  ... {0} more'.format(len(differences) - limit))
+        return '\n'.join(lines)
+
+    def save(self, filename):
+        """Write the table of this strategy to FILENAME."""
+        with open(filename, 'wb') as f:
+            f.write(self.table)
+
+    @classmethod
+    def load(cls, filename, name=None):
+        """Return the strategy whose table is stored in FILENAME.  The goal
+        is inferred from the size of the table.
+
+        >>> import os, tempfile
+        >>> from hog import always_roll
+        >>> filename = os.path.join(tempfile.mkdtemp(), 'always_roll.bin')
+        >>> compile_strategy(always_roll(3), goal=6).save(filename)
+        >>> strategy = CompiledStrategy.load(filename)
+        >>> strategy.goal, strategy(11, 5), strategy.__name__
+        (6, 3, 'always_roll')
+        """
+        with open(filename, 'rb') as f:
+            table = f.read()
+        goal = round((len(table) / 2) ** 0.5)
+        if name is None:
+            name = os.path.splitext(os.path.basename(filename))[0]
+        return cls(table, goal, name)
+
+def compile_strategy(strategy, goal=GOAL_SCORE, name=None):
+    """Return a CompiledStrategy that rolls the same number of dice as
+    STRATEGY in every state of a game to GOAL.  A strategy that is already
+    compiled for GOAL is returned unchanged.
+
+    >>> strategy = compile_strategy(final_strategy)
+    >>> strategy.__name__, strategy(0, 0) == final_strategy(0, 0)
+    ('final_strategy', True)
+    >>> compile_strategy(strategy) is strategy
+    True
+    """
+    if isinstance(strategy, CompiledStrategy) and strategy.goal == goal:
+        return strategy
+    if name is None:
+        name = getattr(strategy, '__name__', 'compiled_strategy')
+    table = bytes(strategy(score, opponent_score)
+                  for score in range(2 * goal)
+                  for opponent_score in range(goal))
+    return CompiledStrategy(table, goal, name)
+
+def table_of(strategy, goal=GOAL_SCORE):
+    """Return the table of STRATEGY if it is compiled for GOAL, and None
+    otherwise.
+
+    >>> table_of(final_strategy) is None
+    True
+    >>> from hog import always_roll
+    >>> table_of(compile_strategy(always_roll(2), 10), 10)[:4]
+    b'\\x02\\x02\\x02\\x02'
+    """
+    if isinstance(strategy, CompiledStrategy) and strategy.goal == goal:
+        return strategy.table
+    return None
+
+@main
+def run():
+    """Compare final_strategy to the optimal strategy."""
+    from hog_optimal import load_optimal_strategy
+    print(compile_strategy(final_strategy).diff_report(load_optimal_strategy()))
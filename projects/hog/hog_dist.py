@@ -0,0 +1,54 @@
+"""Exact probability distributions of the outcomes of rolling dice in Hog.
+
+A distribution is a tuple of (outcome, probability) pairs, sorted by outcome,
+that lists every outcome with a non-zero probability.  Distributions of
+roll_dice are computed once for each number of dice and kind of dice.
+"""
+
+from functools import lru_cache
+
+@lru_cache(maxsize=None)
+def roll_dice_pmf(num_rolls, sides=6):
+    """Return the distribution of roll_dice(NUM_ROLLS, dice) for fair dice
+    with SIDES sides.  A turn scores 1 if any die comes up 1 (Pig out), and
+    the sum of the dice otherwise.
+
+    >>> roll_dice_pmf(1, 4)
+    ((1, 0.25), (2, 0.25), (3, 0.25), (4, 0.25))
+    >>> roll_dice_pmf(2, 4)[:3]
+    ((1, 0.4375), (4, 0.0625), (5, 0.125))
+    >>> round(sum(p for _, p in roll_dice_pmf(10)), 12)
+    1.0
+    """
+    assert num_rolls > 0, 'Must roll at least once.'
+    # Count the ways to reach each sum with dice that never come up 1
+    counts = {0: 1}
+    for _ in range(num_rolls):
+        rolled = {}
+        for total, ways in counts.items():
+            for outcome in range(2, sides + 1):
+                rolled[total + outcome] = rolled.get(total + outcome, 0) + ways
+        counts = rolled
+    rolls = sides ** num_rolls
+    pig_out = 1 - (sides - 1) ** num_rolls / rolls
+    return ((1, pig_out),) + tuple((total, ways / rolls)
+                                   for total, ways in sorted(counts.items()))
+
+def expectation(pmf):
+    """Return the expected outcome of the distribution PMF.
+
+    >>> expectation(roll_dice_pmf(1, 6))
+    3.5
+    >>> round(expectation(roll_dice_pmf(6, 6)), 4)
+    8.7027
+    """
+    return sum(outcome * p for outcome, p in pmf)
+
+def variance(pmf):
+    """Return the variance of the outcome of the distribution PMF.
+
+    >>> variance(roll_dice_pmf(1, 4))
+    1.25
+    """
+    mean = expectation(pmf)
+    return sum((outcome - mean) ** 2 * p for outcome, p in pmf)
@@ -0,0 +1,98 @@
+"""Exact win probabilities for games of Hog.
+
+Instead of simulating games, the functions in this module compute the
+probability that each player wins by considering every outcome of every turn,
+weighted by its probability.  The state of a game before a turn is the player
+about to roll, that player's score, and the opponent's score.  Each turn
+increases the sum of the two scores (a Swine swap only exchanges them), so no
+state is visited twice and the probability of winning from each state depends
+only on states with larger total scores.
+
+The rules are those of play: Pig out, Free bacon from take_turn, Hog wild
+from select_dice, and Swine swap, or those of a variant given as a Rules
+object (see hog_rules).  As in winner, a game in which both players finish
+with the same score is won by player 1.
+"""
+
+from hog import GOAL_SCORE, always_roll, other
+from hog_compile import table_of
+from hog_rules import STANDARD, Rules
+
+def turn_pmf(num_rolls, score, opponent_score, rules=STANDARD):
+    """Return the distribution of the points scored by rolling NUM_ROLLS dice
+    with SCORE against OPPONENT_SCORE under RULES.
+
+    >>> turn_pmf(0, 10, 47)
+    ((4, 1.0),)
+    >>> turn_pmf(1, 3, 4)[0]
+    (1, 0.25)
+    """
+    return rules.turn_pmf(num_rolls, score, opponent_score)
+
+def win_probability(strategy0, strategy1, score0=0, score1=0, goal=GOAL_SCORE,
+                    rules=None):
+    """Return the probability that player 0 wins a game played by STRATEGY0
+    against STRATEGY1 from SCORE0 and SCORE1, with player 0 rolling first.
+    The game is played to GOAL, or under RULES if given.
+
+    >>> round(win_probability(always_roll(5), always_roll(5), 99, 0), 12)
+    1.0
+    >>> round(win_probability(always_roll(5), always_roll(5)), 4)
+    0.499
+    >>> rules = Rules(hog_wild=False, swine_swap=False)
+    >>> round(win_probability(always_roll(5), always_roll(5), rules=rules), 4)
+    0.5376
+
+    Compiled strategies (see hog_compile) are read from their tables.
+
+    >>> from hog_compile import compile_strategy
+    >>> round(win_probability(compile_strategy(always_roll(5)), always_roll(5)), 4)
+    0.499
+    """
+    if rules is None:
+        rules = Rules(goal=goal)
+    goal = rules.goal
+    strategies = (strategy0, strategy1)
+    tables = (table_of(strategy0, goal), table_of(strategy1, goal))
+    wins = {}
+
+    def player0_wins(who, score, opponent_score):
+        """The probability that player 0 wins when player WHO, with SCORE, is
+        about to roll against OPPONENT_SCORE, which is less than GOAL."""
+        table = tables[who]
+        if table is None:
+            num_rolls = strategies[who](score, opponent_score)
+        else:
+            num_rolls = table[score * goal + opponent_score]
+        result = 0.0
+        for points, chance in rules.turn_pmf(num_rolls, score, opponent_score):
+            new_score, new_opponent_score = score + points, opponent_score
+            if rules.swaps(new_score, opponent_score):
+                new_score, new_opponent_score = opponent_score, new_score
+            if new_score >= goal: # The game is over
+                if who == 0 and new_score > new_opponent_score:
+                    result += chance
+                elif who == 1 and new_opponent_score > new_score:
+                    result += chance
+                continue
+            state = (other(who), new_opponent_score, new_score)
+            if state not in wins:
+                wins[state] = player0_wins(*state)
+            result += chance * wins[state]
+        return result
+
+    if score1 >= goal:
+        return float(score0 > score1)
+    return player0_wins(0, score0, score1)
+
+def exact_win_rate(strategy, baseline=always_roll(5), rules=None):
+    """Return the win rate (0 to 1) of STRATEGY against BASELINE, averaged
+    over playing first and playing second, like average_win_rate, under the
+    standard rules or RULES.
+
+    >>> exact_win_rate(always_roll(5))
+    0.5
+    """
+    win_rate_as_player_0 = win_probability(strategy, baseline, rules=rules)
+    win_rate_as_player_1 = 1 - win_probability(baseline, strategy, rules=rules)
+    return (win_rate_as_player_0 + win_rate_as_player_1) / 2
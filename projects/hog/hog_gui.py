@@ -89,11 +89,12 @@ class HogGUI(Frame):
     # Widget Initialization #
     #########################
 
-    def __init__(self, parent, computer=False):
+    def __init__(self, parent, computer=False, computer_strategy=None):
         """Replace hog module's dice with hooks to GUI and start a game.
 
-        parent   -- parent widget (should be root)
-        computer -- True if playing against a computer
+        parent            -- parent widget (should be root)
+        computer          -- True if playing against a computer
+        computer_strategy -- the computer's strategy (default final_strategy)
         """
         super().__init__(parent)
         self.pack(fill=BOTH)
@@ -109,6 +110,7 @@ class HogGUI(Frame):
         hog.six_sided = self.make_dice(6)
         hog.four_sided = self.make_dice(4)
         self.computer, self.turn = computer, 0
+        self.computer_strategy = computer_strategy or hog.final_strategy
         self.play()
 
     def init_scores(self):
@@ -241,7 +243,7 @@ class HogGUI(Frame):
         if self.computer and self.who == self.turn:
             self.update()
             self.after(DELAY)
-            result = hog.final_strategy(score, opp_score)
+            result = self.computer_strategy(score, opp_score)
         else:
             self.roll_entry.focus_set()
             self.wait_variable(self.roll_verified)
@@ -294,10 +296,11 @@ class HogGUI(Frame):
         self.roll_verified.set(HogGUI.KILL)
         super().destroy()
 
-def run_GUI(computer=False):
+def run_GUI(computer=False, computer_strategy=None):
     """Start the GUI.
 
-    computer -- True if playing against computer
+    computer          -- True if playing against computer
+    computer_strategy -- the computer's strategy (default final_strategy)
     """
     root = Tk()
     root.title('The Game of Hog')
@@ -314,7 +317,7 @@ def run_GUI(computer=False):
         6: PhotoImage(file='images/die6.gif'),
     }
 
-    app = HogGUI(root, computer)
+    app = HogGUI(root, computer, computer_strategy)
     root.mainloop()
 
 ##########
@@ -363,10 +366,18 @@ def run(*args):
                         help='play against the final strategy in hog.py. '
                              'Computer alternates playing as player 0 and 1.',
                         action='store_true')
+    parser.add_argument('-o', '--optimal',
+                        help='play against the optimal strategy computed by '
+                             'hog_optimal.py.',
+                        action='store_true')
     parser.add_argument('-d', '--delay',
                         help='time delay for computer, in seconds', type=int,
                         default=2)
     args = parser.parse_args()
     global DELAY
     DELAY = args.delay * 1000
-    run_GUI(computer=args.final)
+    if args.optimal:
+        from hog_optimal import load_optimal_strategy
+        run_GUI(computer=True, computer_strategy=load_optimal_strategy())
+    else:
+        run_GUI(computer=args.final)
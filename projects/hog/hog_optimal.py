@@ -0,0 +1,90 @@
+"""An optimal strategy for Hog, stored as a table of numbers of dice.
+
+Under the rules of play, a game ends as soon as the player who just rolled
+has reached the goal, and that player wins.  The chance that the player about
+to roll wins therefore depends only on the two scores, and each choice of dice
+leads to states with a larger total score (see hog_exact).  Solving the states
+in order of decreasing total score gives, in a single pass, the exact win
+probability of each state and a number of dice that maximizes it.
+
+The numbers of dice are stored in a table of bytes with the layout of a
+CompiledStrategy (see hog_compile).  Run this module to regenerate the table
+file.
+"""
+
+import os
+from hog import GOAL_SCORE, final_strategy
+from hog_compile import CompiledStrategy
+from hog_exact import exact_win_rate
+from hog_rules import Rules
+from ucb import main
+
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          'optimal_strategy.bin')
+
+def solve_optimal(goal=GOAL_SCORE, rules=None):
+    """Return a bytearray of the optimal number of dice to roll in each state,
+    and a list of the probability of winning from each state with it.  The
+    game is played to GOAL under the standard rules, or under RULES (see
+    hog_rules) if given.
+
+    >>> table, wins = solve_optimal(20)
+    >>> table[19 * 20 + 0]  # Free bacon finishes the game
+    0
+    >>> round(wins[0], 4)
+    0.477
+    >>> table, wins = solve_optimal(rules=Rules(goal=20, free_bacon=False))
+    >>> table[19 * 20 + 0], round(wins[0], 4)
+    (1, 0.4764)
+    """
+    if rules is None:
+        rules = Rules(goal=goal)
+    goal = rules.goal
+    rows = 2 * goal
+    table = bytearray(rows * goal)
+    wins = [0.0] * (rows * goal)
+    for total in range(rows + goal - 2, -1, -1):
+        for opponent_score in range(max(0, total - rows + 1),
+                                    min(goal, total + 1)):
+            score = total - opponent_score
+            best_rolls, best_chance = 0, -1.0
+            for num_rolls in range(rules.min_rolls, rules.max_rolls + 1):
+                chance = 0.0
+                for points, p in rules.turn_pmf(num_rolls, score, opponent_score):
+                    new_score = score + points
+                    if rules.swaps(new_score, opponent_score):
+                        # Swine swap: the opponent rolls next with new_score
+                        chance += p * (1 - wins[new_score * goal + opponent_score])
+                    elif new_score >= goal:
+                        chance += p
+                    else:
+                        chance += p * (1 - wins[opponent_score * goal + new_score])
+                if chance > best_chance + 1e-12: # Prefer fewer dice in ties
+                    best_rolls, best_chance = num_rolls, chance
+            table[score * goal + opponent_score] = best_rolls
+            wins[score * goal + opponent_score] = best_chance
+    return table, wins
+
+def load_optimal_strategy(filename=TABLE_FILE):
+    """Return the optimal strategy stored in FILENAME, solving and saving it
+    first if the file does not exist.
+
+    >>> strategy = load_optimal_strategy()
+    >>> strategy.goal, strategy == CompiledStrategy.load(TABLE_FILE)
+    (100, True)
+    """
+    if not os.path.exists(filename):
+        CompiledStrategy(solve_optimal()[0]).save(filename)
+    return CompiledStrategy.load(filename, 'optimal_strategy')
+
+@main
+def run():
+    """Solve for the optimal strategy, save its table, and report how it
+    compares to final_strategy."""
+    table, wins = solve_optimal()
+    optimal_strategy = CompiledStrategy(table, name='optimal_strategy')
+    optimal_strategy.save(TABLE_FILE)
+    print('Saved {0} bytes to {1}'.format(len(table), TABLE_FILE))
+    print('Chance of winning by rolling first:', wins[0])
+    print('Win rate against final_strategy:',
+          exact_win_rate(optimal_strategy, final_strategy))
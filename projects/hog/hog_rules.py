@@ -0,0 +1,210 @@
+"""Variants of the rules of Hog.
+
+A Rules object describes a variant of the game: the goal, the number of sides
+of the dice, the largest number of dice a player may roll, and whether each of
+the special rules (Free bacon, Hog wild, and Swine swap) applies.  The
+standard rules, STANDARD, are those of hog.py.
+
+The solvers and simulators of hog_exact, hog_optimal, and hog_batch take a
+Rules object.  Solving a variant is expensive, so solve stores each solved
+table in a file named by a digest of the rules and by SOLVER_VERSION, and
+reads it back when the same variant is solved again by the same solver.
+"""
+
+import hashlib
+import os
+import random
+from array import array
+from dice import make_fair_dice
+from hog import GOAL_SCORE, roll_dice, take_turn
+from hog_dist import roll_dice_pmf
+from ucb import main
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'solved')
+SOLVER_VERSION = 1 # Increase when hog_optimal or the table format changes
+
+class Rules:
+    """The rules of a variant of Hog.
+
+    >>> rules = Rules(goal=50, swine_swap=False)
+    >>> rules
+    Rules(goal=50, sides=6, wild_sides=4, max_rolls=10, free_bacon=True, hog_wild=True, swine_swap=False)
+    >>> rules == Rules(goal=50, swine_swap=False), rules == STANDARD
+    (True, False)
+    >>> rules.free_bacon_points(47), rules.dice_sides(3, 4), rules.swaps(20, 10)
+    (4, 4, False)
+    >>> Rules(free_bacon=False).min_rolls
+    1
+    """
+
+    fields = ('goal', 'sides', 'wild_sides', 'max_rolls', 'free_bacon',
+              'hog_wild', 'swine_swap')
+
+    def __init__(self, goal=GOAL_SCORE, sides=6, wild_sides=4, max_rolls=10,
+                 free_bacon=True, hog_wild=True, swine_swap=True):
+        assert goal > 0 and sides > 1 and wild_sides > 1 and max_rolls > 0
+        self.goal = goal
+        self.sides = sides
+        self.wild_sides = wild_sides
+        self.max_rolls = max_rolls
+        self.free_bacon = free_bacon
+        self.hog_wild = hog_wild
+        self.swine_swap = swine_swap
+        self.min_rolls = 0 if free_bacon else 1
+        self.dice = {}
+
+    def key(self):
+        return tuple(getattr(self, field) for field in self.fields)
+
+    def __eq__(self, other):
+        return isinstance(other, Rules) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return 'Rules({0})'.format(', '.join(
+            '{0}={1!r}'.format(field, getattr(self, field))
+            for field in self.fields))
+
+    def digest(self):
+        """Return a hexadecimal digest that identifies these rules.
+
+        >>> STANDARD.digest() == Rules().digest() != Rules(goal=99).digest()
+        True
+        """
+        return hashlib.sha1(repr(self).encode()).hexdigest()
+
+    def free_bacon_points(self, opponent_score):
+        """Return the points scored by rolling zero dice against
+        OPPONENT_SCORE, as in take_turn.  Scores of 100 or more use their
+        last two digits."""
+        assert self.free_bacon, 'Free bacon is not allowed'
+        if opponent_score < 100:
+            return take_turn(0, opponent_score)
+        return abs(opponent_score // 10 % 10 - opponent_score % 10) + 1
+
+    def dice_sides(self, score, opponent_score):
+        """Return the number of sides of the dice rolled with SCORE against
+        OPPONENT_SCORE, as in select_dice."""
+        if self.hog_wild and (score + opponent_score) % 7 == 0:
+            return self.wild_sides
+        return self.sides
+
+    def swaps(self, score, opponent_score):
+        """Return whether the scores are swapped after a turn that ends with
+        SCORE against OPPONENT_SCORE, as in play."""
+        return self.swine_swap and (score == 2 * opponent_score or
+                                    opponent_score == 2 * score)
+
+    def turn_pmf(self, num_rolls, score, opponent_score):
+        """Return the distribution of the points scored by rolling NUM_ROLLS
+        dice with SCORE against OPPONENT_SCORE.
+
+        >>> STANDARD.turn_pmf(0, 10, 47)
+        ((4, 1.0),)
+        >>> Rules(sides=2).turn_pmf(2, 0, 1)
+        ((1, 0.75), (4, 0.25))
+        """
+        if num_rolls == 0:
+            return ((self.free_bacon_points(opponent_score), 1.0),)
+        return roll_dice_pmf(num_rolls, self.dice_sides(score, opponent_score))
+
+    def take_turn(self, num_rolls, score, opponent_score):
+        """Simulate a turn of rolling NUM_ROLLS dice with SCORE against
+        OPPONENT_SCORE and return the points scored."""
+        assert self.min_rolls <= num_rolls <= self.max_rolls, 'Illegal roll'
+        if num_rolls == 0:
+            return self.free_bacon_points(opponent_score)
+        sides = self.dice_sides(score, opponent_score)
+        if sides not in self.dice:
+            self.dice[sides] = make_fair_dice(sides, random.getrandbits(63))
+        return roll_dice(num_rolls, self.dice[sides])
+
+    def play(self, strategy0, strategy1, score0=0, score1=0, record=None):
+        """Simulate a game under these rules and return the final scores of
+        both players, as play does.  If RECORD is given, it is called after
+        each turn with NUM_ROLLS | POINTS << 8 (see hog_trace).
+
+        >>> from hog import always_roll
+        >>> score0, score1 = Rules(goal=30).play(always_roll(5), always_roll(5))
+        >>> max(score0, score1) >= 30
+        True
+        """
+        scores, strategies, who = [score0, score1], (strategy0, strategy1), 0
+        while scores[1 - who] < self.goal:
+            score, opponent_score = scores[who], scores[1 - who]
+            num_rolls = strategies[who](score, opponent_score)
+            points = self.take_turn(num_rolls, score, opponent_score)
+            score += points
+            if self.swaps(score, opponent_score):
+                score, opponent_score = opponent_score, score
+            scores[who], scores[1 - who] = score, opponent_score
+            if record is not None:
+                record(num_rolls | points << 8)
+            who = 1 - who
+        return scores[0], scores[1]
+
+STANDARD = Rules()
+
+def cache_file(rules, cache_dir=CACHE_DIR):
+    """Return the name of the file that holds the solved table of RULES.
+
+    >>> os.path.basename(cache_file(STANDARD)).startswith(
+    ...     'optimal-v{0}-'.format(SOLVER_VERSION))
+    True
+    """
+    return os.path.join(cache_dir, 'optimal-v{0}-{1}.bin'.format(
+        SOLVER_VERSION, rules.digest()))
+
+def solve(rules=STANDARD, cache_dir=CACHE_DIR):
+    """Return the optimal table of numbers of dice and the list of win
+    probabilities of each state under RULES (see hog_optimal.solve_optimal),
+    reading them from CACHE_DIR if they have been solved before, and saving
+    them there otherwise.
+
+    >>> import tempfile
+    >>> cache_dir = tempfile.mkdtemp()
+    >>> rules = Rules(goal=20)
+    >>> table, wins = solve(rules, cache_dir)
+    >>> os.path.exists(cache_file(rules, cache_dir))
+    True
+    >>> solve(rules, cache_dir) == (table, wins)
+    True
+    """
+    filename = cache_file(rules, cache_dir)
+    states = 2 * rules.goal * rules.goal
+    if os.path.exists(filename):
+        with open(filename, 'rb') as f:
+            table = f.read(states)
+            wins = array('d')
+            wins.frombytes(f.read())
+        return table, wins.tolist()
+    from hog_optimal import solve_optimal
+    table, wins = solve_optimal(rules=rules)
+    os.makedirs(cache_dir, exist_ok=True)
+    partial = filename + '.tmp'
+    with open(partial, 'wb') as f:
+        f.write(table)
+        f.write(array('d', wins).tobytes())
+    os.replace(partial, filename)
+    return bytes(table), wins
+
+def optimal_strategy(rules=STANDARD, cache_dir=CACHE_DIR):
+    """Return the optimal strategy under RULES as a CompiledStrategy."""
+    from hog_compile import CompiledStrategy
+    return CompiledStrategy(solve(rules, cache_dir)[0], rules.goal,
+                            'optimal_strategy')
+
+@main
+def run():
+    """Report the chance that the first player wins with optimal play under
+    each variant that leaves out one rule."""
+    variants = [('standard', STANDARD),
+                ('no Free bacon', Rules(free_bacon=False)),
+                ('no Hog wild', Rules(hog_wild=False)),
+                ('no Swine swap', Rules(swine_swap=False)),
+                ('goal 50', Rules(goal=50))]
+    for name, rules in variants:
+        _, wins = solve(rules)
+        print('{0:<16} {1:.4f}'.format(name, wins[0]))
@@ -0,0 +1,187 @@
+"""Evaluate many Hog strategies against a baseline in parallel.
+
+Each strategy to evaluate is either a strategy function or a (factory,
+arguments) pair, such as (always_roll, (8,)), that returns a strategy when
+called.  Because the strategies are sent to worker processes, functions must
+be defined at the top level of a module; functools.partial can be used to fix
+the extra arguments of strategies such as bacon_strategy.
+
+The games for each strategy are split into batches, half with the strategy
+playing first and half with it playing second.  Each batch is played in a
+worker process with its own random seed, derived from the seed of the whole
+experiment, so results are reproducible regardless of how many processes run
+them or in what order the batches finish.
+"""
+
+import math
+import random
+from dice import seed_dice
+from hog import always_roll, bacon_strategy, final_strategy, swap_strategy
+from hog_batch import play_many
+from ucb import main
+
+BATCH_SIZE = 2000 # Games per batch given to a worker
+
+def build_strategy(spec):
+    """Return the strategy described by SPEC, a strategy or (factory, args).
+
+    >>> build_strategy((always_roll, (3,)))(0, 0)
+    3
+    >>> build_strategy(always_roll(2))(0, 0)
+    2
+    """
+    if isinstance(spec, tuple):
+        factory, args = spec
+        return factory(*args)
+    return spec
+
+def strategy_name(spec):
+    """Return a name for the strategy described by SPEC.
+
+    >>> from functools import partial
+    >>> strategy_name((always_roll, (3,))), strategy_name(final_strategy)
+    ('always_roll(3)', 'final_strategy')
+    >>> strategy_name(partial(bacon_strategy, margin=9))
+    'bacon_strategy(margin=9)'
+    """
+    if isinstance(spec, tuple):
+        factory, args = spec
+        return '{0}({1})'.format(factory.__name__, ', '.join(map(repr, args)))
+    if hasattr(spec, 'func'):
+        args = [repr(a) for a in spec.args]
+        args += ['{0}={1!r}'.format(k, v) for k, v in spec.keywords.items()]
+        return '{0}({1})'.format(spec.func.__name__, ', '.join(args))
+    return spec.__name__
+
+def batch_seed(seed, index, side, batch):
+    """Return the seed for a batch of games of strategy INDEX playing SIDE
+    (0 or 1) in an experiment with SEED.  Seeds are derived from strings so
+    that they do not depend on the process or on hash randomization."""
+    key = '{0}:{1}:{2}:{3}'.format(seed, index, side, batch)
+    return random.Random(key).getrandbits(63)
+
+def play_batch(index, spec, baseline, side, n, seed):
+    """Play N games of SPEC against BASELINE with SPEC playing SIDE and
+    return (INDEX, the number of games won by SPEC, N)."""
+    seed_dice(seed)
+    strategy, other = build_strategy(spec), build_strategy(baseline)
+    if side == 0:
+        _, _, winners = play_many(strategy, other, n, seed=seed)
+        wins = n - sum(winners)
+    else:
+        _, _, winners = play_many(other, strategy, n, seed=seed)
+        wins = sum(winners)
+    return index, int(wins), n
+
+def _play_batch(task):
+    return play_batch(*task)
+
+class Result:
+    """The games won by a strategy named NAME against the baseline."""
+
+    def __init__(self, name):
+        self.name = name
+        self.wins = 0
+        self.games = 0
+
+    @property
+    def win_rate(self):
+        return self.wins / self.games if self.games else 0.0
+
+    def interval(self, z=1.96):
+        """Return the Wilson score interval of the win rate, with 95%
+        confidence by default.
+
+        >>> r = Result('s')
+        >>> r.wins, r.games = 60, 100
+        >>> tuple(round(x, 3) for x in r.interval())
+        (0.502, 0.691)
+        """
+        if not self.games:
+            return 0.0, 1.0
+        n, p = self.games, self.win_rate
+        center = (p + z * z / (2 * n)) / (1 + z * z / n)
+        spread = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+        return center - spread, center + spread
+
+def stream_results(specs, baseline=(always_roll, (5,)), games=10000,
+                   seed=0, processes=None, batch_size=BATCH_SIZE):
+    """Play GAMES games of each strategy in SPECS against BASELINE in a pool
+    of PROCESSES workers, yielding the list of Results after each batch of
+    games finishes."""
+    results = [Result(strategy_name(spec)) for spec in specs]
+    tasks = []
+    for index, spec in enumerate(specs):
+        for side in (0, 1):
+            remaining, batch = games // 2 + side * (games % 2), 0
+            while remaining > 0:
+                n = min(batch_size, remaining)
+                tasks.append((index, spec, baseline, side, n,
+                              batch_seed(seed, index, side, batch)))
+                remaining, batch = remaining - n, batch + 1
+    if processes == 1:
+        replies = map(_play_batch, tasks)
+        pool = None
+    else:
+        import multiprocessing
+        pool = multiprocessing.Pool(processes)
+        replies = pool.imap_unordered(_play_batch, tasks)
+    try:
+        for index, wins, n in replies:
+            results[index].wins += wins
+            results[index].games += n
+            yield results
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+def run_experiment(specs, **options):
+    """Return the Results of stream_results once all games are played.
+
+    >>> specs = [(always_roll, (5,))]
+    >>> [r] = run_experiment(specs, games=100, processes=1)
+    >>> r.name, r.games, r.wins == run_experiment(specs, games=100, processes=2)[0].wins
+    ('always_roll(5)', 100, True)
+    """
+    results = []
+    for results in stream_results(specs, **options):
+        pass
+    return results
+
+def format_results(results):
+    """Return a table of RESULTS, sorted by win rate.
+
+    >>> r = Result('always_roll(6)')
+    >>> r.wins, r.games = 60, 100
+    >>> print(format_results([r]))
+    strategy                       games  win rate  95% interval
+    always_roll(6)                   100    0.6000  0.5020-0.6906
+    """
+    lines = ['{0:<28} {1:>7}  {2:>8}  {3}'.format('strategy', 'games',
+                                                 'win rate', '95% interval')]
+    for r in sorted(results, key=lambda r: -r.win_rate):
+        low, high = r.interval()
+        lines.append('{0:<28} {1:>7}  {2:>8.4f}  {3:.4f}-{4:.4f}'.format(
+            r.name, r.games, r.win_rate, low, high))
+    return '\n'.join(lines)
+
+@main
+def run(*args):
+    """Evaluate the strategies of hog.py against always_roll(5)."""
+    import argparse
+    parser = argparse.ArgumentParser(description='Evaluate Hog strategies')
+    parser.add_argument('-n', '--games', type=int, default=10000,
+                        help='games per strategy')
+    parser.add_argument('-p', '--processes', type=int, default=None,
+                        help='worker processes (default: one per core)')
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    args = parser.parse_args()
+    specs = [(always_roll, (n,)) for n in range(11)]
+    specs += [bacon_strategy, swap_strategy, final_strategy]
+    total = args.games * len(specs)
+    for results in stream_results(specs, games=args.games, seed=args.seed,
+                                  processes=args.processes):
+        played = sum(r.games for r in results)
+        print('\r{0}/{1} games played'.format(played, total), end='', flush=True)
+    print()
+    print(format_results(results))
@@ -0,0 +1,209 @@
+"""Round-robin tournaments between Hog strategies.
+
+Every strategy in a Tournament plays every other strategy both as player 0
+and as player 1.  The chance that player 0 wins each pairing is computed
+exactly with hog_exact or estimated by simulating games with hog_batch.
+
+Pairings are expensive, so their results are kept in a cache file.  Each
+strategy is compiled (see hog_compile), and a pairing is identified by the
+digests of the two compiled tables, the method used to play it, and
+CACHE_VERSION, which changes whenever a method would give a different result
+for the same tables.  Renaming
+a strategy or running the tournament again reuses every pairing already in
+the cache, and adding a strategy only plays the pairings that involve it.
+"""
+
+import json
+import os
+from hog import GOAL_SCORE, always_roll, bacon_strategy, final_strategy, swap_strategy
+from hog_compile import CompiledStrategy, compile_strategy
+from ucb import main
+
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          'tournament_cache.json')
+CACHE_VERSION = 1 # Increase when hog_exact or hog_batch results change
+
+def load_cache(filename):
+    """Return the dictionary of pairing results stored in FILENAME, or an
+    empty dictionary if there is none."""
+    if not os.path.exists(filename):
+        return {}
+    with open(filename) as f:
+        return json.load(f)
+
+def save_cache(cache, filename):
+    """Write CACHE to FILENAME, replacing it only once it is written."""
+    partial = filename + '.tmp'
+    with open(partial, 'w') as f:
+        json.dump(cache, f, indent=0, sort_keys=True)
+    os.replace(partial, filename)
+
+class Tournament:
+    """A round-robin tournament between strategies.
+
+    METHOD is 'exact' to compute win probabilities with hog_exact, or
+    'simulate' to estimate them from GAMES games played by hog_batch with
+    random seed SEED.
+
+    >>> import os, tempfile
+    >>> cache_file = os.path.join(tempfile.mkdtemp(), 'cache.json')
+    >>> t = Tournament(goal=20, cache_file=cache_file)
+    >>> for n in (2, 4, 6):
+    ...     t.add(always_roll(n), 'always_roll({0})'.format(n))
+    >>> t.play()
+    6
+    >>> print(t.format_ranking())
+    rank  strategy          win rate
+       1  always_roll(6)      0.6215
+       2  always_roll(4)      0.5086
+       3  always_roll(2)      0.3699
+
+    Another tournament with the same cache only plays new pairings.
+
+    >>> t = Tournament(goal=20, cache_file=cache_file)
+    >>> for n in (2, 4, 6, 8):
+    ...     t.add(always_roll(n), 'always_roll({0})'.format(n))
+    >>> t.play()
+    6
+    >>> [name for name, _ in t.ranking()]
+    ['always_roll(6)', 'always_roll(4)', 'always_roll(8)', 'always_roll(2)']
+    """
+
+    def __init__(self, goal=GOAL_SCORE, method='exact', games=100000, seed=0,
+                 cache_file=CACHE_FILE):
+        assert method in ('exact', 'simulate'), 'Unknown method: ' + method
+        self.goal = goal
+        self.method = method
+        self.games = games
+        self.seed = seed
+        self.cache_file = cache_file
+        self.cache = load_cache(cache_file) if cache_file else {}
+        self.strategies = []
+
+    def add(self, strategy, name=None):
+        """Add STRATEGY to the tournament under NAME, which defaults to the
+        name of the strategy.  A name that is already taken is numbered.
+
+        >>> t = Tournament(goal=20, cache_file=None)
+        >>> for n in (2, 4, 6):
+        ...     t.add(always_roll(n))
+        >>> [s.__name__ for s in t.strategies]
+        ['strategy', 'strategy#2', 'strategy#3']
+        >>> t.play()
+        6
+        >>> [name for name, _ in t.ranking()]
+        ['strategy#3', 'strategy#2', 'strategy']
+        """
+        compiled = compile_strategy(strategy, self.goal, name)
+        names = {s.__name__ for s in self.strategies}
+        if compiled.__name__ in names:
+            base, number = compiled.__name__, 2
+            while '{0}#{1}'.format(base, number) in names:
+                number += 1
+            compiled = CompiledStrategy(compiled.table, self.goal,
+                                        '{0}#{1}'.format(base, number))
+        self.strategies.append(compiled)
+
+    def key(self, strategy0, strategy1):
+        """Return the cache key of the pairing of STRATEGY0 and STRATEGY1.
+
+        >>> t = Tournament(goal=20, cache_file=None)
+        >>> s = compile_strategy(always_roll(1), 20)
+        >>> t.key(s, s) == 'v{0}:{1}:{1}:exact'.format(CACHE_VERSION, s.digest())
+        True
+        """
+        if self.method == 'exact':
+            method = 'exact'
+        else:
+            method = 'simulate:{0}:{1}'.format(self.games, self.seed)
+        return 'v{0}:{1}:{2}:{3}'.format(CACHE_VERSION, strategy0.digest(),
+                                         strategy1.digest(), method)
+
+    def compute(self, strategy0, strategy1):
+        """Return the chance that STRATEGY0 wins against STRATEGY1 when
+        STRATEGY0 rolls first, without using the cache."""
+        if self.method == 'exact':
+            from hog_exact import win_probability
+            return win_probability(strategy0, strategy1, goal=self.goal)
+        from hog_batch import play_many
+        _, _, winners = play_many(strategy0, strategy1, self.games,
+                                  self.goal, self.seed)
+        return 1 - sum(winners) / self.games
+
+    def win_probability(self, strategy0, strategy1):
+        """Return the chance that STRATEGY0 wins against STRATEGY1 when
+        STRATEGY0 rolls first, from the cache if possible."""
+        key = self.key(strategy0, strategy1)
+        if key not in self.cache:
+            self.cache[key] = self.compute(strategy0, strategy1)
+        return self.cache[key]
+
+    def pairings(self):
+        """Return a list of each ordered pair of distinct strategies."""
+        return [(s0, s1) for s0 in self.strategies for s1 in self.strategies
+                if s0 is not s1]
+
+    def play(self):
+        """Play every pairing that is not in the cache, saving the cache
+        after each one, and return the number of pairings played."""
+        played = 0
+        for strategy0, strategy1 in self.pairings():
+            if self.key(strategy0, strategy1) not in self.cache:
+                self.win_probability(strategy0, strategy1)
+                played += 1
+                if self.cache_file:
+                    save_cache(self.cache, self.cache_file)
+        return played
+
+    def win_matrix(self):
+        """Return a dictionary from each pair of names (a, b) to the win rate
+        of a against b, averaged over playing first and playing second."""
+        return {(a.__name__, b.__name__): rate
+                for (a, b), rate in zip(self.pairings(), self.win_rates())}
+
+    def win_rates(self):
+        """Return a list of the win rate of a against b, averaged over
+        playing first and playing second, for each pairing (a, b)."""
+        return [(self.win_probability(s0, s1) +
+                 1 - self.win_probability(s1, s0)) / 2
+                for s0, s1 in self.pairings()]
+
+    def ranking(self):
+        """Return a list of (name, win rate) pairs, from best to worst, where
+        the win rate of a strategy is its average against all others."""
+        opponents = max(len(self.strategies) - 1, 1)
+        totals = [0.0] * len(self.strategies)
+        index = {id(s): i for i, s in enumerate(self.strategies)}
+        for (s0, _), rate in zip(self.pairings(), self.win_rates()):
+            totals[index[id(s0)]] += rate / opponents
+        ranked = sorted(zip(self.strategies, totals), key=lambda item: -item[1])
+        return [(s.__name__, total) for s, total in ranked]
+
+    def format_ranking(self):
+        """Return a table of the ranking of the strategies."""
+        lines = ['rank  {0:<16} {1:>9}'.format('strategy', 'win rate')]
+        for rank, (name, rate) in enumerate(self.ranking(), 1):
+            lines.append('{0:>4}  {1:<16} {2:>9.4f}'.format(rank, name, rate))
+        return '\n'.join(lines)
+
+@main
+def run(*args):
+    """Play a tournament between the strategies of hog.py and the optimal
+    strategy."""
+    import argparse
+    from hog_optimal import load_optimal_strategy
+    parser = argparse.ArgumentParser(description='Play a Hog tournament')
+    parser.add_argument('-s', '--simulate', action='store_true',
+                        help='simulate games instead of solving exactly')
+    parser.add_argument('-n', '--games', type=int, default=100000,
+                        help='games per pairing when simulating')
+    args = parser.parse_args()
+    method = 'simulate' if args.simulate else 'exact'
+    tournament = Tournament(method=method, games=args.games)
+    for n in range(1, 11):
+        tournament.add(always_roll(n), 'always_roll({0})'.format(n))
+    for strategy in (bacon_strategy, swap_strategy, final_strategy,
+                     load_optimal_strategy()):
+        tournament.add(strategy)
+    print('Played {0} new pairings'.format(tournament.play()))
+    print(tournament.format_ranking())
@@ -0,0 +1,217 @@
+"""Record games of Hog in a compact binary trace, and analyze traces.
+
+A trace file starts with a header that holds the rules of the games (see
+hog_rules), followed by one record per turn.  Each record is an unsigned
+16-bit little-endian integer, num_rolls | points << 8, and the record
+END_OF_GAME follows the last turn of each game.
+
+The other facts about a turn are determined by the rules: players alternate
+turns, the dice are chosen by the scores (Hog wild), and so is a Swine swap.
+Recording only what the dice and the strategy decided keeps recording cheap;
+read_games replays the turns under the recorded rules to recover the player,
+the dice, the swaps, and the scores before each turn.
+"""
+
+import json
+import struct
+import sys
+from array import array
+from collections import Counter, namedtuple
+from hog_rules import STANDARD, Rules
+from ucb import main
+
+MAGIC = b'HOGT'
+VERSION = 1
+HEADER = struct.Struct('<4sBH') # Magic, version, and length of the rules
+END_OF_GAME = 0xFF
+CHUNK = 1 << 16 # Records read or written at once
+
+assert array('H').itemsize == 2, 'Records must be 16 bits'
+
+Turn = namedtuple('Turn', ['player', 'sides', 'num_rolls', 'points',
+                           'swapped', 'score', 'opponent_score'])
+Game = namedtuple('Game', ['turns', 'score0', 'score1'])
+
+def write_header(f, rules):
+    fields = json.dumps({field: getattr(rules, field)
+                         for field in Rules.fields}).encode()
+    f.write(HEADER.pack(MAGIC, VERSION, len(fields)) + fields)
+
+def read_header(f):
+    """Return the rules stored in the header of the trace file F."""
+    magic, version, length = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('Not a version {0} Hog trace'.format(VERSION))
+    return Rules(**json.loads(f.read(length).decode()))
+
+class Recorder:
+    """Records games played under RULES to the trace file FILENAME.
+
+    >>> import os, random, tempfile
+    >>> from hog import always_roll, final_strategy
+    >>> filename = os.path.join(tempfile.mkdtemp(), 'games.trace')
+    >>> random.seed(0)
+    >>> with Recorder(filename, Rules()) as recorder:
+    ...     scores = [recorder.play(final_strategy, always_roll(5))
+    ...               for _ in range(100)]
+    >>> games = list(read_games(filename))
+    >>> [(g.score0, g.score1) for g in games] == scores
+    True
+    >>> games[0].turns[0]
+    Turn(player=0, sides=4, num_rolls=4, points=1, swapped=False, score=0, opponent_score=0)
+    """
+
+    def __init__(self, filename, rules=STANDARD):
+        assert rules.max_rolls < END_OF_GAME, 'Too many dice to record'
+        assert rules.max_rolls * max(rules.sides, rules.wild_sides) < 256, \
+            'Too many points to record'
+        self.rules = rules
+        self.file = open(filename, 'wb')
+        write_header(self.file, rules)
+        self.records = array('H')
+        self.record = self.records.append
+
+    def play(self, strategy0, strategy1):
+        """Play and record a game, and return its final scores."""
+        scores = self.rules.play(strategy0, strategy1, record=self.record)
+        self.record(END_OF_GAME)
+        if len(self.records) >= CHUNK:
+            self.flush()
+        return scores
+
+    def flush(self):
+        if sys.byteorder == 'big':
+            self.records.byteswap()
+        self.records.tofile(self.file)
+        del self.records[:]
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def record_games(strategy0, strategy1, n, filename, rules=STANDARD):
+    """Record N games of STRATEGY0 against STRATEGY1 to FILENAME."""
+    with Recorder(filename, rules) as recorder:
+        for _ in range(n):
+            recorder.play(strategy0, strategy1)
+
+def read_records(f):
+    """Yield the records of the trace file F, after its header."""
+    while True:
+        data = f.read(2 * CHUNK)
+        if not data:
+            return
+        records = array('H')
+        records.frombytes(data)
+        if sys.byteorder == 'big':
+            records.byteswap()
+        yield from records
+
+def read_games(filename):
+    """Yield each Game in the trace file FILENAME, one at a time."""
+    with open(filename, 'rb') as f:
+        rules = read_header(f)
+        turns, scores, who = [], [0, 0], 0
+        for record in read_records(f):
+            if record == END_OF_GAME:
+                yield Game(turns, scores[0], scores[1])
+                turns, scores, who = [], [0, 0], 0
+                continue
+            num_rolls, points = record & 0xFF, record >> 8
+            score, opponent_score = scores[who], scores[1 - who]
+            sides = rules.dice_sides(score, opponent_score) if num_rolls else 0
+            new_score = score + points
+            swapped = rules.swaps(new_score, opponent_score)
+            if swapped:
+                scores[who], scores[1 - who] = opponent_score, new_score
+            else:
+                scores[who] = new_score
+            turns.append(Turn(who, sides, num_rolls, points, swapped,
+                              score, opponent_score))
+            who = 1 - who
+
+class TraceStats:
+    """Aggregate statistics of the games in a trace."""
+
+    def __init__(self):
+        self.games = 0
+        self.turns = 0
+        self.swaps = 0
+        self.wins = [0, 0]
+        self.lengths = Counter()   # Games by number of turns
+        self.decisions = Counter() # Turns by (score, opponent_score, num_rolls)
+
+    def add(self, game):
+        self.games += 1
+        self.turns += len(game.turns)
+        self.lengths[len(game.turns)] += 1
+        self.wins[0 if game.score0 > game.score1 else 1] += 1
+        for turn in game.turns:
+            self.swaps += turn.swapped
+            self.decisions[turn.score, turn.opponent_score, turn.num_rolls] += 1
+
+    def decisions_at(self, score, opponent_score):
+        """Return a dictionary from each number of dice rolled with SCORE
+        against OPPONENT_SCORE to the number of times it was rolled."""
+        return {num_rolls: count
+                for (s, o, num_rolls), count in self.decisions.items()
+                if s == score and o == opponent_score}
+
+    def format(self):
+        """Return a summary of these statistics."""
+        lengths = sorted(self.lengths.elements())
+        lines = [
+            'games: {0}, turns: {1}'.format(self.games, self.turns),
+            'player 0 won: {0:.4f}'.format(self.wins[0] / max(self.games, 1)),
+            'turns per game: mean {0:.2f}, median {1}, min {2}, max {3}'.format(
+                self.turns / max(self.games, 1), lengths[len(lengths) // 2],
+                lengths[0], lengths[-1]) if lengths else 'turns per game: -',
+            'swaps: {0} ({1:.4f} per turn)'.format(
+                self.swaps, self.swaps / max(self.turns, 1)),
+        ]
+        return '\n'.join(lines)
+
+def analyze(filename):
+    """Return the TraceStats of the games in the trace file FILENAME.
+
+    >>> import os, random, tempfile
+    >>> from hog import always_roll
+    >>> filename = os.path.join(tempfile.mkdtemp(), 'games.trace')
+    >>> random.seed(1)
+    >>> record_games(always_roll(5), always_roll(5), 200, filename, Rules(goal=20))
+    >>> stats = analyze(filename)
+    >>> stats.games, sum(stats.lengths.values()), stats.decisions_at(0, 0)
+    (200, 200, {5: 200})
+    >>> stats.turns == sum(n * count for n, count in stats.lengths.items())
+    True
+    """
+    stats = TraceStats()
+    for game in read_games(filename):
+        stats.add(game)
+    return stats
+
+@main
+def run(n=10000, filename='games.trace'):
+    """Record N games of final_strategy against always_roll(5), report the
+    cost of recording them (the best of three trials each way), and analyze
+    the trace."""
+    import time
+    from hog import always_roll, final_strategy
+    n, baseline = int(n), always_roll(5)
+    unrecorded = recorded = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(n):
+            STANDARD.play(final_strategy, baseline)
+        unrecorded = min(unrecorded, time.perf_counter() - start)
+        start = time.perf_counter()
+        record_games(final_strategy, baseline, n, filename)
+        recorded = min(recorded, time.perf_counter() - start)
+    print('Recording overhead: {0:+.1%}'.format(recorded / unrecorded - 1))
+    print(analyze(filename).format())
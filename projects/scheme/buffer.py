@@ -19,6 +19,9 @@ class Buffer:
     The __str__ method prints all tokens read so far, up to the end of the
     current line, and marks the current token with >>.
 
+    If the lines come from a file, its name is the FILENAME of the Buffer, and
+    the number of the line containing the current token is len(buf.lines).
+
     >>> buf = Buffer(iter([['(', '+'], [15], [12, ')']]))
     >>> buf.pop()
     '('
@@ -47,7 +50,8 @@ class Buffer:
     3: 12 ) >>
     >>> buf.pop()  # returns None
     """
-    def __init__(self, source):
+    def __init__(self, source, filename=None):
+        self.filename = filename
         self.index = 0
         self.lines = []
         self.source = source
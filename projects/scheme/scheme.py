@@ -2,8 +2,10 @@
 eval/apply mutual recurrence, environment model, and read-eval-print loop.
 """
 
+import io
 from scheme_primitives import *
 from scheme_reader import *
+from scheme_parallel import parallel_map, scheme_future, scheme_touch
 from ucb import main, trace
 
 ##############
@@ -36,7 +38,10 @@ def scheme_eval(expr, env):
     # Evaluate Combinations
     if (scheme_symbolp(first) # first might be unhashable
         and first in LOGIC_FORMS):
-        return scheme_eval(LOGIC_FORMS[first](rest, env), env)
+        expr, tail_env = LOGIC_FORMS[first](rest, env)
+        if tail_env is None:
+            return expr
+        return scheme_eval(expr, tail_env)
     elif first == "lambda":
         return do_lambda_form(rest, env)
     elif first == "mu":
@@ -59,10 +64,16 @@ def scheme_apply(procedure, args, env):
     if isinstance(procedure, PrimitiveProcedure):
         return apply_primitive(procedure, args, env)
     elif isinstance(procedure, LambdaProcedure):
+        if procedure.leaf:
+            frame = procedure.env.make_pooled_frame(procedure.formals, args)
+            result = scheme_eval(procedure.body, frame)
+            frame.release()
+            return result
         frame = Frame.make_call_frame(procedure.env, procedure.formals, args)           # Make new frame in procedure's parent environment
         return scheme_eval(procedure.body, frame)                                       # Evaluate the procedure in that frame
     elif isinstance(procedure, MuProcedure):
-        frame = Frame.make_call_frame(env, procedure.formals, args)                     # Make new frame in env (given)
+        env.mark_escaped()
+        frame = env.make_mu_frame(procedure.formals, args)                              # Make new frame in env (given)
         return scheme_eval(procedure.body, frame)                                       # Evaluate the procedure in that frame
     else:
         raise SchemeError("Cannot call {0}".format(str(procedure)))
@@ -93,12 +104,28 @@ def apply_primitive(procedure, args, env):
 ################
 
 class Frame:
-    """An environment frame binds Scheme symbols to Scheme values."""
+    """An environment frame binds Scheme symbols to Scheme values.
+
+    A frame has escaped once some value that outlives the current call may
+    refer to it, such as a procedure created in it.  Call frames of leaf
+    procedures that have not escaped are returned to a pool when the call
+    completes and reused for later calls.
+
+    Frames of mu procedure calls, whose parent chains follow the dynamic
+    chain of callers and can be arbitrarily long, have a cache that maps
+    each symbol looked up through them to the ancestor frame that binds it.
+    The caches are valid as long as Frame.version is unchanged; it changes
+    whenever a symbol is bound in an existing frame or unbound.
+    """
+    __slots__ = ('bindings', 'parent', 'escaped', 'cache', 'cache_version')
+    version = 0
 
     def __init__(self, parent):
         """An empty frame with a PARENT frame (that may be None)."""
         self.bindings = {}
         self.parent = parent
+        self.escaped = False
+        self.cache = None
 
     def __repr__(self):
         if self.parent is None:
@@ -109,13 +136,49 @@ class Frame:
 
     def lookup(self, symbol):
         """Return the value bound to SYMBOL.  Errors if SYMBOL is not found."""
-        try:    
-            if symbol in self.bindings.keys():                                      # Check if symbol is a key in bindings
-                return self.bindings[symbol]                                        # Return value bounded to symbol
-            else:
-                return self.parent.lookup(symbol)                                   # Otherwise check parent
-        except:
-            raise SchemeError("unknown identifier: {0}".format(str(symbol)))        # Otherwise raise SchemeError
+        frame = self
+        while frame is not None:
+            if symbol in frame.bindings:                                            # Check if symbol is a key in bindings
+                return frame.bindings[symbol]                                       # Return value bounded to symbol
+            if frame.cache is not None:                                             # Ask a caching frame for the binding frame
+                frame = frame.find_cached(symbol)
+                if frame is None:
+                    break
+                return frame.bindings[symbol]
+            frame = frame.parent                                                    # Otherwise check parent
+        raise SchemeError("unknown identifier: {0}".format(str(symbol)))            # Otherwise raise SchemeError
+
+    def find_cached(self, symbol):
+        """Return the nearest ancestor of SELF, a caching frame that does not
+        bind SYMBOL, that binds SYMBOL (or None), using the cache of SELF.
+
+        >>> env = create_global_frame()
+        >>> env.define("x", 1)
+        >>> frame = env.make_call_frame(nil, nil).make_mu_frame(nil, nil)
+        >>> frame.find_cached("x") is env, "x" in frame.cache
+        (True, True)
+        >>> frame.parent.define("x", 2)
+        >>> frame.lookup("x")
+        2
+        """
+        pending = []                                                                # Caching frames that missed
+        frame = self
+        while True:
+            if frame.cache is not None:
+                if frame.cache_version != Frame.version:                            # Bindings changed since caching
+                    frame.cache.clear()
+                    frame.cache_version = Frame.version
+                if symbol in frame.cache:
+                    found = frame.cache[symbol]
+                    break
+                pending.append(frame)
+            frame = frame.parent
+            if frame is None or symbol in frame.bindings:
+                found = frame
+                break
+        for frame in pending:
+            frame.cache[symbol] = found
+        return found
 
     def global_frame(self):
         """The global environment at the root of the parent chain."""
@@ -136,16 +199,78 @@ class Frame:
         <{a: 1, b: 2, c: 3} -> <Global Frame>>
         """
         frame = Frame(self)
-        if len(formals) != len(vals):                                                   # Make sure formals and vals are the same length
-            raise SchemeError("formals and vals must be the same length")               # If not, raise SchemeError
-        for i in range(len(formals)):                                                   # Loop for each element in formals/vals
-            frame.bindings[formals[i]] = vals[i]                                        # Set value in vals to each key in formals in bindings
+        frame.bind(formals, vals)
         return frame
 
+    def make_mu_frame(self, formals, vals):
+        """Return a call frame like make_call_frame that caches the frames in
+        which symbols looked up through it are bound."""
+        frame = self.make_call_frame(formals, vals)
+        frame.cache = {}
+        frame.cache_version = Frame.version
+        return frame
+
+    def make_pooled_frame(self, formals, vals):
+        """Return a call frame like make_call_frame, reusing a released frame
+        from the pool when one is available.
+
+        >>> env = create_global_frame()
+        >>> formals, vals = read_line("(a b)"), read_line("(1 2)")
+        >>> frame = env.make_pooled_frame(formals, vals)
+        >>> frame.release()
+        >>> env.make_pooled_frame(formals, read_line("(3 4)")) is frame
+        True
+        """
+        if not _FRAME_POOL:
+            return self.make_call_frame(formals, vals)
+        frame = _FRAME_POOL.pop()
+        frame.parent = self
+        try:
+            frame.bind(formals, vals)
+        except SchemeError:
+            frame.release()
+            raise
+        return frame
+
+    def bind(self, formals, vals):
+        """Bind the symbols in the Scheme list FORMALS to the values in the
+        Scheme list VALS in SELF.  Raise an error if the lengths differ."""
+        bindings = self.bindings
+        while formals is not nil and vals is not nil:                                   # Walk formals and vals together
+            bindings[formals.first] = vals.first                                        # Bind each formal to its value
+            formals, vals = formals.second, vals.second
+        if formals is not nil or vals is not nil:                                       # Make sure formals and vals are the same length
+            raise SchemeError("formals and vals must be the same length")               # If not, raise SchemeError
+
+    def release(self):
+        """Return SELF to the frame pool unless it has escaped."""
+        if not self.escaped and len(_FRAME_POOL) < _FRAME_POOL_SIZE:
+            self.bindings.clear()
+            self.parent = None
+            _FRAME_POOL.append(self)
+
+    def mark_escaped(self):
+        """Mark SELF and its ancestors as escaped, so that none of them is
+        reused while a value created in SELF may still refer to it."""
+        frame = self
+        while frame is not None and not frame.escaped:
+            frame.escaped = True
+            frame = frame.parent
+
     def define(self, sym, val):
         """Define Scheme symbol SYM to have value VAL in SELF."""
+        if sym not in self.bindings:
+            Frame.version += 1
         self.bindings[sym] = val
 
+    def undefine(self, sym):
+        """Remove the binding of Scheme symbol SYM from SELF."""
+        del self.bindings[sym]
+        Frame.version += 1
+
+_FRAME_POOL = []
+_FRAME_POOL_SIZE = 1000
+
 class LambdaProcedure:
     """A procedure defined by a lambda expression or the complex define form."""
 
@@ -158,6 +283,7 @@ class LambdaProcedure:
         self.formals = formals
         self.body = body
         self.env = env
+        self.leaf = not may_capture_frame(body)
 
     def __str__(self):
         return "(lambda {0} {1})".format(str(self.formals), str(self.body))
@@ -166,6 +292,29 @@ class LambdaProcedure:
         args = (self.formals, self.body, self.env)
         return "LambdaProcedure({0}, {1}, {2})".format(*(repr(a) for a in args))
 
+# Symbols that, when they appear in a procedure body, may allow the frame of a
+# call to that procedure to be captured by a value that outlives the call.
+_CAPTURING_SYMBOLS = {"lambda", "mu", "define", "eval", "apply", "load"}
+
+def may_capture_frame(body):
+    """Return whether evaluating BODY may capture the frame it is evaluated in.
+
+    >>> may_capture_frame(read_line("(if (< n 2) n (* n (f (- n 1))))"))
+    False
+    >>> may_capture_frame(read_line("(begin (define y 2) (+ x y))"))
+    True
+    """
+    exprs = [body]
+    while exprs:
+        expr = exprs.pop()
+        while isinstance(expr, Pair):
+            if isinstance(expr.first, Pair):
+                exprs.append(expr.first)
+            elif expr.first in _CAPTURING_SYMBOLS:
+                return True
+            expr = expr.second
+    return False
+
 class MuProcedure:
     """A procedure defined by a mu expression, which has dynamic scope.
      _________________
@@ -203,6 +352,7 @@ def do_lambda_form(vals, env):
     check_form(vals, 2)
     formals = vals[0]
     check_formals(formals)
+    env.mark_escaped()
     if len(vals) == 2:                                                          # Checks if there are 2 arguments/elements
         return LambdaProcedure(formals, vals[1], env)                           # Return a string with first element and second element
     return LambdaProcedure(formals, Pair("begin", vals.second), env)            # Call begin on the rest of the elements 
@@ -222,7 +372,7 @@ def do_define_form(vals, env):
     target = vals[0]
     if scheme_symbolp(target):
         check_form(vals, 2, 2)
-        env.bindings[target] = scheme_eval(vals[1], env)            # Sets the target key to the value of the 1st index of vals
+        env.define(target, scheme_eval(vals[1], env))               # Sets the target key to the value of the 1st index of vals
         return target                                               # Return the target key
     elif isinstance(target, Pair):
         if not scheme_symbolp(target[0]):                                                   # Check if first element of target is a symbol
@@ -268,23 +418,28 @@ def do_let_form(vals, env):
 # Logical Special Forms #
 #########################
 
+# Each logical special form returns a pair (EXPR, ENV).  If ENV is a Frame,
+# the value of the form is the value of the expression EXPR in ENV, which is
+# in tail position.  If ENV is None, EXPR is already the value of the form.
+
 def do_if_form(vals, env):
     """Evaluate if form with parameters VALS in environment ENV."""
     check_form(vals, 2, 3)
     if scheme_false(scheme_eval(vals[0], env)):           # Make sure the first expression evaluates to #f
         if len(vals) == 2:                                # Check if the length is 2
-            return okay                                   # Return okay (undefined value)
-        return vals[2]                                    # If #f, return the second value
-    return vals[1]                                        # Else, return the first value
+            return okay, None                             # Return okay (undefined value)
+        return vals[2], env                               # If #f, return the second value
+    return vals[1], env                                   # Else, return the first value
 
 def do_and_form(vals, env):
     """Evaluate short-circuited and with parameters VALS in environment ENV."""
     if vals is nil:                                         # If vals is empty, return True
-        return True
-    for i in range(len(vals)-1):                            # Loop through range - 1
-        if scheme_false(scheme_eval(vals[i], env)):         # Check if the value evaluates to #f
-            return False                                    # If so, return False
-    return vals[len(vals)-1]                                # Otherwise, return the last value
+        return True, None
+    while vals.second is not nil:                           # Loop through all but the last expression
+        if scheme_false(scheme_eval(vals.first, env)):      # Check if the value evaluates to #f
+            return False, None                              # If so, return False
+        vals = vals.second
+    return vals.first, env                                  # Otherwise, return the last expression
 
 def quote(value):
     """Return a Scheme expression quoting the Scheme VALUE.
@@ -300,42 +455,40 @@ def quote(value):
 def do_or_form(vals, env):
     """Evaluate short-circuited or with parameters VALS in environment ENV."""
     if vals is nil:
-        return False
-    for i in range(len(vals) - 1):
-        outcome = scheme_eval(vals[i], env)
+        return False, None
+    while vals.second is not nil:
+        outcome = scheme_eval(vals.first, env)
         if scheme_true(outcome):
-            return quote(outcome)
-    return vals[len(vals) - 1]
-    
+            return outcome, None
+        vals = vals.second
+    return vals.first, env
+
 def do_cond_form(vals, env):
     """Evaluate cond form with parameters VALS in environment ENV."""
-    num_clauses = len(vals)
-    for i, clause in enumerate(vals):
+    while vals is not nil:
+        clause = vals.first
         check_form(clause, 1)
         if clause.first == "else":
-            if i < num_clauses-1:
+            if vals.second is not nil:
                 raise SchemeError("else must be last")
-            test = True
             if clause.second is nil:
                 raise SchemeError("badly formed else clause")
-        else:                                                           
-            test = scheme_eval(clause.first, env)                       # Uses above for loop to go through each condition clause
-        if scheme_true(test):                                           # Tests if the first clause of condition is true
-            if clause.second == nil:                                    # Checks if there is anything after the first clause
-                return quote(scheme_eval(clause.first, env))            # If there isn't, returns the value of the first clause
-            return do_begin_form(clause.second, env)                    # Else, run the code after the first clause
-        if str(clause.first) == "else":                                 # Checks if the first clause is else
-            return do_begin_form(clause.second, env)                    # Returns the code after the else clause
-    return okay
+            return do_begin_form(clause.second, env)            # Returns the code after the else clause
+        test = scheme_eval(clause.first, env)                   # Go through each condition clause
+        if scheme_true(test):                                   # Tests if the first clause of condition is true
+            if clause.second is nil:                            # Checks if there is anything after the first clause
+                return test, None                               # If there isn't, returns the value of the first clause
+            return do_begin_form(clause.second, env)            # Else, run the code after the first clause
+        vals = vals.second
+    return okay, None
 
 def do_begin_form(vals, env):
     """Evaluate begin form with parameters VALS in environment ENV."""
     check_form(vals, 1)
-    i = 0                                               # Creates a counter
-    while i < (len(vals) - 1):                          # Checks each expression before the final expression
-        scheme_eval(vals[i], env)                       # Evaluate expressions
-        i += 1                                          # Increment counter
-    return vals[len(vals) - 1]                          # Return the final expression
+    while vals.second is not nil:                       # Checks each expression before the final expression
+        scheme_eval(vals.first, env)                    # Evaluate expressions
+        vals = vals.second
+    return vals.first, env                              # Return the final expression
 
 
 LOGIC_FORMS = {
@@ -379,17 +532,34 @@ def check_formals(formals):
 # Tail Recursion #
 ##################
 
+# An object whose enter method is called with each compound procedure whose
+# body scheme_optimized_eval evaluates in place, and its environment, or None.
+# Its end method is called with the depth that enter returned once the body
+# of the next tail call replaces that body.
+# Set by scheme_trace.Tracer.
+call_tracer = None
+
 def scheme_optimized_eval(expr, env):
-    """Evaluate Scheme expression EXPR in environment ENV."""
+    """Evaluate Scheme expression EXPR in environment ENV.
+
+    Expressions in tail position are evaluated by the loop below instead of
+    by a recursive call, so tail-recursive procedures run in constant space.
+    A pooled call frame acquired for a leaf procedure is released once the
+    loop moves to another call or returns.  Likewise, a call reported to the
+    call_tracer ends once the loop moves to another call.
+    """
+    pooled = traced = None
     while True:
         if expr is None:
             raise SchemeError("Cannot evaluate an undefined expression.")
 
         # Evaluate Atoms
         if scheme_symbolp(expr):
-            return env.lookup(expr)
+            result = env.lookup(expr)
+            break
         elif scheme_atomp(expr) or scheme_stringp(expr) or expr is okay:
-            return expr
+            result = expr
+            break
 
         # All non-atomic expressions are lists.
         if not scheme_listp(expr):
@@ -399,24 +569,56 @@ def scheme_optimized_eval(expr, env):
         # Evaluate Combinations
         if (scheme_symbolp(first) # first might be unhashable
             and first in LOGIC_FORMS):
-            "*** YOUR CODE HERE ***"
+            expr, tail_env = LOGIC_FORMS[first](rest, env)
+            if tail_env is None:
+                result = expr
+                break
+            env = tail_env
         elif first == "lambda":
-            return do_lambda_form(rest, env)
+            result = do_lambda_form(rest, env)
+            break
         elif first == "mu":
-            return do_mu_form(rest)
+            result = do_mu_form(rest)
+            break
         elif first == "define":
-            return do_define_form(rest, env)
+            result = do_define_form(rest, env)
+            break
         elif first == "quote":
-            return do_quote_form(rest)
+            result = do_quote_form(rest)
+            break
         elif first == "let":
-            "*** YOUR CODE HERE ***"
+            expr, env = do_let_form(rest, env)
         else:
-            "*** YOUR CODE HERE ***"
+            procedure = scheme_optimized_eval(first, env)
+            args = rest.map(lambda operand: scheme_optimized_eval(operand, env))
+            if call_tracer is not None and not isinstance(procedure, PrimitiveProcedure):
+                if traced is not None:
+                    call_tracer.end(traced)
+                traced = call_tracer.enter(procedure, env)
+            if isinstance(procedure, LambdaProcedure):
+                if procedure.leaf:
+                    frame = procedure.env.make_pooled_frame(procedure.formals, args)
+                else:
+                    frame = procedure.env.make_call_frame(procedure.formals, args)
+                if pooled is not None:
+                    pooled.release()
+                pooled = frame if procedure.leaf else None
+                expr, env = procedure.body, frame
+            elif isinstance(procedure, MuProcedure):
+                env.mark_escaped()
+                expr = procedure.body
+                env = env.make_mu_frame(procedure.formals, args)
+            else:
+                result = scheme_apply(procedure, args, env)
+                break
+    if pooled is not None:
+        pooled.release()
+    return result
 
 ################################################################
 # Uncomment the following line to apply tail call optimization #
 ################################################################
-# scheme_eval = scheme_optimized_eval
+scheme_eval = scheme_optimized_eval
 
 
 ################
@@ -425,7 +627,9 @@ def scheme_optimized_eval(expr, env):
 
 def read_eval_print_loop(next_line, env, quiet=False, startup=False,
                          interactive=False, load_files=()):
-    """Read and evaluate input until an end of file or keyboard interrupt."""
+    """Read and evaluate input until an end of file or keyboard interrupt.
+    Return the number of errors that were reported."""
+    errors = 0
     if startup:
         for filename in load_files:
             scheme_load(filename, True, env)
@@ -442,14 +646,15 @@ def read_eval_print_loop(next_line, env, quiet=False, startup=False,
                 'maximum recursion depth exceeded' not in err.args[0]):
                 raise
             print("Error:", err)
+            errors += 1
         except KeyboardInterrupt:  # <Control>-C
             if not startup:
                 raise
             print("\nKeyboardInterrupt")
             if not interactive:
-                return
+                return errors
         except EOFError:  # <Control>-D, etc.
-            return
+            return errors
 
 
 def scheme_load(*args):
@@ -489,31 +694,150 @@ def scheme_open(filename):
 def create_global_frame():
     """Initialize and return a single-frame environment with built-in names."""
     env = Frame(None)
+    env.escaped = True
     env.define("eval", PrimitiveProcedure(scheme_eval, True))
     env.define("apply", PrimitiveProcedure(scheme_apply, True))
     env.define("load", PrimitiveProcedure(scheme_load, True))
+    env.define("parallel-map", PrimitiveProcedure(parallel_map, True))
+    env.define("future", PrimitiveProcedure(scheme_future, True))
+    env.define("touch", PrimitiveProcedure(scheme_touch))
     add_primitives(env)
     return env
 
+def watch_files(filenames, env):
+    """Load FILENAMES into ENV and return a next_line function for the
+    read-eval-print loop that first re-evaluates any top-level forms of those
+    files that have changed since they were last loaded."""
+    from scheme_watch import Watcher
+    watcher = Watcher(env, scheme_eval)
+    for filename in filenames:
+        with scheme_open(filename) as infile:
+            watcher.load(infile.name)
+    def next_line():
+        watcher.poll()
+        return buffer_input()
+    return next_line
+
+class BatchOutput(io.TextIOWrapper):
+    """A text stream for batch mode that writes to the file descriptor FD
+    through a large buffer.  Requests to flush are ignored until the stream
+    is closed, so that output is written in a few large blocks."""
+
+    def __init__(self, fd, buffer_size=1 << 20):
+        raw = io.FileIO(fd, 'w', closefd=False)
+        super().__init__(io.BufferedWriter(raw, buffer_size))
+
+    def flush(self):
+        pass
+
+    def close(self):
+        super().flush()
+        super().close()
+
+def run_batch(filenames):
+    """Evaluate each of FILENAMES in its own global frame, without prompts or
+    turtle graphics, and with buffered output.  Return an exit status: 0 if
+    every file was evaluated without errors, and 1 otherwise.  A file that
+    raises an unexpected exception counts as failed, and the next file is
+    evaluated.  Unless a turtle backend was chosen, turtle primitives draw on
+    a RecordingTurtle that is discarded, so that no window is opened."""
+    if turtle_backend() is None:
+        from scheme_turtle import RecordingTurtle
+        set_turtle_backend(RecordingTurtle())
+    stdout = sys.stdout
+    stdout.flush()
+    sys.stdout = output = BatchOutput(stdout.fileno())
+    status = 0
+    try:
+        for filename in filenames:
+            try:
+                with scheme_open(filename) as infile:
+                    lines = infile.readlines()
+            except SchemeError as err:
+                print("Error:", err)
+                status = 1
+                continue
+            def next_line():
+                return buffer_lines(lines, prompt=None)
+            try:
+                if read_eval_print_loop(next_line, create_global_frame()):
+                    status = 1
+            except Exception as err:
+                print("Error: {0}: {1}".format(type(err).__name__, err))
+                status = 1
+    finally:
+        sys.stdout = stdout
+        output.close()
+    return status
+
+def profile_file(filename):
+    """Evaluate the Scheme source file FILENAME under the sampling profiler and
+    print its lines annotated with where evaluation time was spent.  Return an
+    exit status: 0 if the file was evaluated without errors, and 1 otherwise."""
+    from scheme_profile import Profiler
+    with scheme_open(filename) as infile:
+        filename, lines = infile.name, infile.readlines()
+    src = Buffer(tokenize_lines(LineReader(list(lines), None)), filename)
+    def next_line():
+        src.current()
+        return src
+    with Profiler() as profiler:
+        errors = read_eval_print_loop(next_line, create_global_frame())
+    profiler.report(filename, lines)
+    return 1 if errors else 0
+
 @main
 def run(*argv):
     next_line = buffer_input
     interactive = True
     load_files = ()
+    env = create_global_frame()
+    recorder = tracer = trace_out = None
+    trace_sample = 1
+    while argv[:1] in [('--turtle-out',), ('--trace-out',),
+                       ('--trace-sample',)] and len(argv) > 1:
+        option, value, argv = argv[0], argv[1], argv[2:]
+        if option == '--turtle-out':
+            from scheme_turtle import RecordingTurtle
+            recorder, turtle_out = RecordingTurtle(), value
+            set_turtle_backend(recorder)
+        elif option == '--trace-out':
+            trace_out = value
+        else:
+            trace_sample = int(value)
+    if trace_out:
+        from scheme_trace import Tracer
+        tracer = Tracer(sys.modules[__name__], trace_sample)
+        tracer.install()
+    def save_outputs():
+        if recorder:
+            recorder.save(turtle_out)
+        if tracer:
+            tracer.uninstall()
+            tracer.save(trace_out)
     if argv:
         try:
             filename = argv[0]
             if filename == '-load':
                 load_files = argv[1:]
+            elif filename == '-watch':
+                next_line = watch_files(argv[1:], env)
+            elif filename == '--profile' and len(argv) == 2:
+                sys.exit(profile_file(argv[1]))
+            elif filename == '--batch':
+                status = run_batch(argv[1:])
+                save_outputs()
+                sys.exit(status)
             else:
                 input_file = open(argv[0])
                 lines = input_file.readlines()
                 def next_line():
                     return buffer_lines(lines)
                 interactive = False
-        except IOError as err:
+        except (IOError, SchemeError) as err:
             print(err)
             sys.exit(1)
-    read_eval_print_loop(next_line, create_global_frame(), startup=True,
+    read_eval_print_loop(next_line, env, startup=True,
                          interactive=interactive, load_files=load_files)
+    save_outputs()
     tscheme_exitonclick()
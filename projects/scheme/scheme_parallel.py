@@ -0,0 +1,270 @@
+"""The scheme_parallel module implements primitives that evaluate Scheme
+procedure calls in a pool of worker processes:
+
+    (parallel-map f lst)  Apply f to each element of lst, returning a list
+    (future f)            Start computing (f) and return a future
+    (touch x)             Wait for the value of future x (or return x)
+
+Each worker process holds its own interpreter and global frame.  To call a
+procedure in a worker, the procedure and its arguments are serialized
+together with the user-defined bindings of the caller's global frame that the
+procedure can reach, which the worker installs in its own global frame before the call.  Primitive
+procedures, nil, okay, and the global frame itself are sent by name rather
+than by value.  Scheme lists are sent as flat sequences, so that long lists do
+not exhaust the recursion limit of pickle.
+
+Only lambda procedures (and primitives) can be sent to a worker.  Mu
+procedures depend on the dynamic environment of their caller, which is not
+available in another process.
+"""
+
+import importlib
+import io
+import os
+import pickle
+from scheme_primitives import PrimitiveProcedure, SchemeError, okay
+from scheme_reader import Pair, nil
+
+CHUNKS_PER_WORKER = 4 # Chunks of a parallel-map given to each worker
+
+#################
+# Serialization #
+#################
+
+def build_list(items, tail):
+    """Return the Scheme list of ITEMS ending with TAIL."""
+    result = tail
+    for item in reversed(items):
+        result = Pair(item, result)
+    return result
+
+class SchemePickler(pickle.Pickler):
+    """Pickles Scheme values relative to the global frame ENV."""
+
+    def __init__(self, file, env):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.env = env
+        self.primitive_names = {}
+        for name, value in env.bindings.items():
+            if isinstance(value, PrimitiveProcedure):
+                self.primitive_names.setdefault(id(value), name)
+
+    def persistent_id(self, obj):
+        if obj is nil:
+            return 'nil'
+        elif obj is okay:
+            return 'okay'
+        elif obj is self.env:
+            return 'global'
+        elif isinstance(obj, PrimitiveProcedure):
+            if id(obj) not in self.primitive_names:
+                raise SchemeError('cannot send {0} to a worker'.format(obj))
+            return ('primitive', self.primitive_names[id(obj)])
+        return None
+
+    def reducer_override(self, obj):
+        if isinstance(obj, Pair):
+            items = []
+            while isinstance(obj, Pair):
+                items.append(obj.first)
+                obj = obj.second
+            return build_list, (items, obj)
+        elif type(obj).__name__ == 'MuProcedure':
+            raise SchemeError('cannot send a mu procedure to a worker')
+        return NotImplemented
+
+class SchemeUnpickler(pickle.Unpickler):
+    """Unpickles Scheme values relative to the global frame ENV."""
+
+    def __init__(self, file, env):
+        super().__init__(file)
+        self.env = env
+
+    def persistent_load(self, pid):
+        if pid == 'nil':
+            return nil
+        elif pid == 'okay':
+            return okay
+        elif pid == 'global':
+            return self.env
+        elif pid[0] == 'primitive':
+            return self.env.bindings[pid[1]]
+        raise pickle.UnpicklingError('unknown reference {0}'.format(pid))
+
+def dumps(value, env):
+    """Serialize the Scheme VALUE relative to the global frame ENV.
+
+    >>> import scheme
+    >>> env = scheme.create_global_frame()
+    >>> square = scheme.scheme_eval(scheme.read_line("(lambda (x) (* x x))"), env)
+    >>> copy = loads(dumps(Pair(square, nil), env), env)
+    >>> copy.first.env is env, copy.second is nil
+    (True, True)
+    """
+    out = io.BytesIO()
+    try:
+        SchemePickler(out, env).dump(value)
+    except (TypeError, pickle.PicklingError) as err:
+        raise SchemeError('cannot send value to a worker: {0}'.format(err))
+    return out.getvalue()
+
+def loads(data, env):
+    """Deserialize DATA, which was serialized by dumps, relative to ENV."""
+    return SchemeUnpickler(io.BytesIO(data), env).load()
+
+def user_bindings(env, procedure):
+    """The bindings of the global frame ENV that PROCEDURE can reach: those of
+    the symbols that appear in its body or in the values of other reachable
+    bindings.  Primitives are sent by name, and bindings that cannot be sent
+    to a worker, such as mu procedures and futures, are left out.
+
+    >>> import scheme
+    >>> env = scheme.create_global_frame()
+    >>> def run(line):
+    ...     return scheme.scheme_eval(scheme.read_line(line), env)
+    >>> for line in ["(define m (mu () 1))", "(define k 3)", "(define j 4)",
+    ...              "(define (add-k x) (+ x k))", "(define (f x) (add-k x))"]:
+    ...     _ = run(line)
+    >>> sorted(user_bindings(env, env.lookup("f")))
+    ['add-k', 'k']
+    >>> print(run("(parallel-map f (list 1 2 3))"))
+    (4 5 6)
+    """
+    bindings, seen = {}, set()
+    pending = [procedure]
+    while pending:
+        value = pending.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        if isinstance(value, str):
+            if value in env.bindings and value not in bindings:
+                bound = env.bindings[value]
+                if sendable(bound, env):
+                    bindings[value] = bound
+                    pending.append(bound)
+        elif isinstance(value, Pair):
+            pending.extend((value.first, value.second))
+        elif type(value).__name__ == 'LambdaProcedure':
+            pending.extend((value.formals, value.body, value.env))
+        elif hasattr(value, 'bindings') and value is not env:
+            pending.extend(value.bindings.values())         # A closure's frame
+            pending.append(value.parent)
+    return bindings
+
+def sendable(value, env):
+    """Whether the global binding VALUE can and should be sent to a worker."""
+    if isinstance(value, (PrimitiveProcedure, Future)):
+        return False
+    try:
+        dumps(value, env)
+    except SchemeError:
+        return False
+    return True
+
+###########
+# Workers #
+###########
+
+_worker_env = None # The global frame of the interpreter in a worker process
+
+def _call_in_worker(header, chunk):
+    """Apply the procedure described by HEADER to each argument list in CHUNK
+    and return the serialized list of results, or an error message."""
+    global _worker_env
+    interpreter = importlib.import_module(header[0])
+    if _worker_env is None:
+        _worker_env = interpreter.create_global_frame()
+    env = _worker_env
+    try:
+        bindings, procedure = loads(header[1], env)
+        env.bindings.update(bindings)
+        results = [interpreter.scheme_apply(procedure, args, env)
+                   for args in loads(chunk, env)]
+        return True, dumps(results, env)
+    except (SchemeError, RecursionError) as err:
+        return False, str(err)
+
+_pool = None
+_workers = os.cpu_count() or 1
+
+def worker_pool():
+    """Return the pool of worker processes, starting it if needed."""
+    global _pool
+    if _pool is None:
+        import multiprocessing
+        _pool = multiprocessing.Pool(_workers)
+    return _pool
+
+def _header(procedure, env):
+    """Serialize PROCEDURE and the bindings of ENV's global frame that it can
+    reach for a worker, along with the name of the interpreter module that
+    defines the classes of the frames and procedures being sent."""
+    check_sendable(procedure)
+    env = env.global_frame()
+    return (type(env).__module__,
+            dumps((user_bindings(env, procedure), procedure), env))
+
+def check_sendable(procedure):
+    if isinstance(procedure, PrimitiveProcedure):
+        return
+    if type(procedure).__name__ != 'LambdaProcedure':
+        raise SchemeError('{0} is not a lambda procedure'.format(procedure))
+
+def _result(reply, env):
+    ok, value = reply
+    if not ok:
+        raise SchemeError(value)
+    return loads(value, env.global_frame())
+
+##############
+# Primitives #
+##############
+
+def parallel_map(procedure, lst, env):
+    """Apply PROCEDURE to each element of the Scheme list LST in worker
+    processes and return the list of results, in order."""
+    items = []
+    while isinstance(lst, Pair):
+        items.append(Pair(lst.first, nil))
+        lst = lst.second
+    if lst is not nil:
+        raise SchemeError('argument 1 of parallel-map is not a list')
+    if not items:
+        return nil
+    header = _header(procedure, env)
+    pool = worker_pool()
+    size = -(-len(items) // (CHUNKS_PER_WORKER * _workers))
+    chunks = [dumps(items[i:i+size], env.global_frame())
+              for i in range(0, len(items), size)]
+    replies = pool.starmap(_call_in_worker, [(header, c) for c in chunks])
+    results = []
+    for reply in replies:
+        results.extend(_result(reply, env))
+    return build_list(results, nil)
+
+class Future:
+    """The eventual value of a procedure call running in a worker."""
+
+    def __init__(self, async_result, env):
+        self.async_result = async_result
+        self.env = env
+
+    def __str__(self):
+        return '#[future]'
+
+    def value(self):
+        return _result(self.async_result.get(), self.env)[0]
+
+def scheme_future(procedure, env):
+    """Start calling the zero-argument PROCEDURE in a worker process."""
+    chunk = dumps([nil], env.global_frame())
+    pool = worker_pool()
+    return Future(pool.apply_async(_call_in_worker,
+                                   (_header(procedure, env), chunk)), env)
+
+def scheme_touch(value):
+    """Return the value of VALUE if it is a future, or VALUE otherwise."""
+    if isinstance(value, Future):
+        return value.value()
+    return value
@@ -3,12 +3,11 @@
 import math
 import operator
 import sys
+from fractions import Fraction
 from scheme_reader import Pair, nil
+from scheme_turtle import RecordingTurtle
 
-try:
-    import turtle
-except:
-    print("warning: could not import the turtle module.", file=sys.stderr)
+turtle = None # The turtle module is imported by the first turtle primitive
 
 class SchemeError(Exception):
     """Exception indicating an error in a Scheme program."""
@@ -74,10 +73,16 @@ def scheme_false(val):
 def scheme_not(x):
     return not scheme_true(x)
 
-@primitive("eq?", "equal?")
+@primitive("eq?")
 def scheme_eqp(x, y):
     return x == y
 
+@primitive("equal?")
+def scheme_equalp(x, y):
+    """Return whether X and Y are structurally equal, comparing lists element
+    by element without recursion on their tails."""
+    return x == y
+
 @primitive("pair?")
 def scheme_pairp(x):
     return isinstance(x, Pair)
@@ -88,19 +93,32 @@ def scheme_nullp(x):
 
 @primitive("list?")
 def scheme_listp(x):
-    """Return whether x is a well-formed list. Assumes no cycles."""
-    while x is not nil:
-        if not isinstance(x, Pair):
+    """Return whether x is a well-formed list.  A cyclic list is not, which is
+    detected when a pointer moving two pairs at a time meets one moving one."""
+    slow = x
+    while True:
+        for _ in range(2):
+            if x is nil:
+                return True
+            if not isinstance(x, Pair):
+                return False
+            x = x.second
+        slow = slow.second
+        if x is slow:
             return False
-        x = x.second
-    return True
 
 @primitive("length")
 def scheme_length(x):
-    if x is nil:
-        return 0
-    check_type(x, scheme_listp, 0, 'length')
-    return len(x)
+    n, p, slow = 0, x, x
+    while isinstance(p, Pair):
+        n, p = n + 1, p.second
+        if n % 2 == 0:
+            slow = slow.second
+            if p is slow:
+                break
+    if p is not nil:
+        check_type(x, scheme_listp, 0, 'length')
+    return n
 
 @primitive("cons")
 def scheme_cons(x, y):
@@ -116,6 +134,44 @@ def scheme_cdr(x):
     check_type(x, scheme_pairp, 0, 'cdr')
     return x.second
 
+@primitive("list-tail")
+def scheme_list_tail(x, k):
+    check_type(k, scheme_integerp, 1, 'list-tail')
+    for _ in range(int(k)):
+        check_type(x, scheme_pairp, 0, 'list-tail')
+        x = x.second
+    return x
+
+@primitive("reverse")
+def scheme_reverse(x):
+    check_type(x, scheme_listp, 0, 'reverse')
+    result = nil
+    while x is not nil:
+        result, x = Pair(x.first, result), x.second
+    return result
+
+@primitive("member")
+def scheme_member(x, lst):
+    """Return the first sublist of LST whose car is equal? to X, or false."""
+    check_type(lst, scheme_listp, 1, 'member')
+    while lst is not nil:
+        if scheme_equalp(x, lst.first):
+            return lst
+        lst = lst.second
+    return False
+
+@primitive("assoc")
+def scheme_assoc(key, alist):
+    """Return the first pair in the association list ALIST whose car is
+    equal? to KEY, or false."""
+    check_type(alist, scheme_listp, 1, 'assoc')
+    while alist is not nil:
+        entry = alist.first
+        check_type(entry, scheme_pairp, 1, 'assoc')
+        if scheme_equalp(key, entry.first):
+            return entry
+        alist = alist.second
+    return False
 
 @primitive("list")
 def scheme_list(*vals):
@@ -152,7 +208,7 @@ def scheme_symbolp(x):
 
 @primitive("number?")
 def scheme_numberp(x):
-    return isinstance(x, int) or isinstance(x, float)
+    return isinstance(x, (int, float, Fraction))
 
 @primitive("integer?")
 def scheme_integerp(x):
@@ -172,8 +228,8 @@ def _arith(fn, init, vals):
     s = init
     for val in vals:
         s = fn(s, val)
-    if round(s) == s:
-        s = round(s)
+    if isinstance(s, Fraction) and s.denominator == 1:
+        s = s.numerator
     return s
 
 @primitive("+")
@@ -190,10 +246,18 @@ def scheme_sub(val0, *vals):
 def scheme_mul(*vals):
     return _arith(operator.mul, 1, vals)
 
+def _divide(x, y):
+    """Divide X by Y, exactly unless either of them is inexact."""
+    if isinstance(x, float) or isinstance(y, float):
+        return x / y
+    if y == 0:
+        raise ZeroDivisionError("division by zero")
+    return Fraction(x, y)
+
 @primitive("/")
 def scheme_div(val0, val1):
     try:
-        return _arith(operator.truediv, val0, [val1])
+        return _arith(_divide, val0, [val1])
     except ZeroDivisionError as err:
         raise SchemeError(err)
 
@@ -221,6 +285,47 @@ def scheme_ceil(val):
     _check_nums(val)
     return math.ceil(val)
 
+@primitive("exact?")
+def scheme_exactp(x):
+    _check_nums(x)
+    return not isinstance(x, float)
+
+@primitive("inexact?")
+def scheme_inexactp(x):
+    _check_nums(x)
+    return isinstance(x, float)
+
+@primitive("exact->inexact")
+def scheme_exact_to_inexact(x):
+    _check_nums(x)
+    return float(x)
+
+@primitive("inexact->exact")
+def scheme_inexact_to_exact(x):
+    _check_nums(x)
+    try:
+        return _exact(Fraction(x))
+    except (OverflowError, ValueError) as err:
+        raise SchemeError(err)
+
+def _exact(x):
+    """Return the exact rational X as an int if it is an integer."""
+    return x.numerator if x.denominator == 1 else x
+
+@primitive("numerator")
+def scheme_numerator(x):
+    _check_nums(x)
+    if isinstance(x, float):
+        return float(Fraction(x).numerator)
+    return Fraction(x).numerator
+
+@primitive("denominator")
+def scheme_denominator(x):
+    _check_nums(x)
+    if isinstance(x, float):
+        return float(Fraction(x).denominator)
+    return Fraction(x).denominator
+
 def _numcomp(op, x, y):
     _check_nums(x, y)
     return op(x, y)
@@ -312,8 +417,24 @@ _turtle_screen_on = False
 def turtle_screen_on():
     return _turtle_screen_on
 
+def set_turtle_backend(backend):
+    """Draw with BACKEND, an object that provides the functions of the turtle
+    module used below, such as a scheme_turtle.RecordingTurtle."""
+    global turtle
+    turtle = backend
+
+def turtle_backend():
+    """The object that turtle primitives draw with, or None if the turtle
+    module has not been imported yet."""
+    return turtle
+
 def _tscheme_prep():
-    global _turtle_screen_on
+    global _turtle_screen_on, turtle
+    if turtle is None:
+        try:
+            import turtle
+        except ImportError:
+            raise SchemeError("could not import the turtle module")
     if not _turtle_screen_on:
         _turtle_screen_on = True
         turtle.title("Scheme Turtles")
@@ -443,10 +564,12 @@ def tscheme_end_fill():
 
 @primitive("exitonclick")
 def tscheme_exitonclick():
-    """Wait for a click on the turtle window, and then close it."""
+    """Wait for a click on the turtle window, and then close it.  A
+    recording backend has no window, so it exits at once."""
     global _turtle_screen_on
     if _turtle_screen_on:
-        print("Close or click on turtle window to complete exit")
+        if not isinstance(turtle, RecordingTurtle):
+            print("Close or click on turtle window to complete exit")
         turtle.exitonclick()
         _turtle_screen_on = False
     return okay
@@ -0,0 +1,103 @@
+"""The scheme_profile module implements a sampling profiler for Scheme programs.
+
+While a Profiler is running, the reader records the file and line on which
+each Pair read from a source file starts.  A timer interrupts the interpreter
+at a fixed interval of CPU time, and the signal handler walks the Python stack
+to find the Scheme expressions being evaluated.  Each sample is attributed to
+the source line of the innermost expression with a known location (its self
+time) and to every distinct line on the stack (its total time).
+
+Nothing is done between samples, so a profiled program runs at nearly its
+usual speed.  Sampling requires signal.setitimer, which is unavailable on
+Windows.
+"""
+
+import signal
+import sys
+from collections import Counter
+import scheme_reader
+from scheme_primitives import SchemeError
+
+# Python functions whose EXPR local is the Scheme expression being evaluated
+EVAL_FUNCTIONS = ('scheme_eval', 'scheme_optimized_eval')
+
+class Profiler:
+    """Samples the evaluation stack every INTERVAL seconds of CPU time.
+
+    >>> profiler = Profiler()
+    >>> profiler.self_counts[('f.scm', 2)] = 3
+    >>> profiler.total_counts.update({('f.scm', 1): 4, ('f.scm', 2): 3})
+    >>> profiler.samples = 4
+    >>> profiler.report('f.scm', ['(define (f)', '  (g))'])
+    4 samples, 1.0 ms apart
+       self   total  line
+             100.0%    1  (define (f)
+      75.0%   75.0%    2    (g))
+      25.0%  (not in f.scm)
+    """
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.samples = 0
+        self.self_counts = Counter()
+        self.total_counts = Counter()
+        self.previous_handler = None
+
+    def start(self):
+        """Record source locations and start sampling."""
+        if not hasattr(signal, 'setitimer'):
+            raise SchemeError('profiling is not supported on this platform')
+        scheme_reader.record_source_locations()
+        self.previous_handler = signal.signal(signal.SIGPROF, self.sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        """Stop sampling and recording source locations."""
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self.previous_handler or signal.SIG_DFL)
+        scheme_reader.record_source_locations(False)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def sample(self, signum, frame):
+        """Tally the source lines of the expressions under evaluation in the
+        Python stack FRAME.  Called by the timer signal."""
+        self.samples += 1
+        lines = set()
+        while frame is not None:
+            if frame.f_code.co_name in EVAL_FUNCTIONS:
+                location = scheme_reader.source_location(frame.f_locals.get('expr'))
+                if location is not None and location not in lines:
+                    if not lines:
+                        self.self_counts[location] += 1
+                    lines.add(location)
+            frame = frame.f_back
+        self.total_counts.update(lines)
+
+    def report(self, filename, lines, out=None):
+        """Print LINES, the contents of FILENAME, annotated with the percent
+        of samples spent evaluating each line itself and in total."""
+        out = out or sys.stdout
+        samples = max(self.samples, 1)
+        def percent(count):
+            return '{0:.1f}%'.format(100 * count / samples) if count else ''
+        print('{0} samples, {1:.1f} ms apart'.format(self.samples,
+                                                     1000 * self.interval),
+              file=out)
+        print('{0:>7} {1:>7}  line'.format('self', 'total'), file=out)
+        attributed = 0
+        for number, line in enumerate(lines, 1):
+            location = (filename, number)
+            attributed += self.self_counts[location]
+            print('{0:>7} {1:>7} {2:>4}  {3}'.format(
+                percent(self.self_counts[location]),
+                percent(self.total_counts[location]),
+                number, line.rstrip('\n')).rstrip(), file=out)
+        if self.samples > attributed:
+            print('{0:>7}  (not in {1})'.format(
+                percent(self.samples - attributed), filename), file=out)
@@ -3,7 +3,7 @@ with a parser for Scheme expressions.
 
 In addition to the types defined in this file, some data types in Scheme are
 represented by their corresponding type in Python:
-    number:       int or float
+    number:       int, float, or Fraction
     symbol:       string
     boolean:      bool
     unspecified:  None
@@ -15,6 +15,7 @@ The __str__ method of a Scheme value will return a Scheme expression that
 would be read to the value, where possible.
 """
 
+from functools import lru_cache
 from ucb import main, trace, interact
 from scheme_tokens import tokenize_lines, DELIMITERS
 from buffer import Buffer, InputReader, LineReader
@@ -37,23 +38,37 @@ class Pair:
     2
     >>> print(s.map(lambda x: x+4))
     (5 6)
+
+    Printing, comparing, and mapping walk lists with loops rather than
+    recursion on second, so they handle lists of any length in linear time.
+
+    >>> long = Pair(0, nil)
+    >>> for i in range(100000):
+    ...     long = Pair(i, long)
+    >>> long == long.map(lambda x: x), str(long)[:12], len(long)
+    (True, '(99999 99998', 100001)
     """
     def __init__(self, first, second):
         self.first = first
         self.second = second
 
     def __repr__(self):
-        return "Pair({0}, {1})".format(repr(self.first), repr(self.second))
+        parts, n, p = [], 0, self
+        while isinstance(p, Pair):
+            parts.append("Pair({0}, ".format(repr(p.first)))
+            n, p = n + 1, p.second
+        parts.append(repr(p))
+        parts.append(")" * n)
+        return "".join(parts)
 
     def __str__(self):
-        s = "(" + str(self.first)
-        second = self.second
+        parts, second = [str(self.first)], self.second
         while isinstance(second, Pair):
-            s += " " + str(second.first)
+            parts.append(str(second.first))
             second = second.second
         if second is not nil:
-            s += " . " + str(second)
-        return s + ")"
+            parts.append(". " + str(second))
+        return "(" + " ".join(parts) + ")"
 
     def __len__(self):
         n, second = 1, self.second
@@ -77,17 +92,42 @@ class Pair:
         return y.first
 
     def __eq__(self, p):
+        """Return whether SELF and P have equal elements in the same structure.
+        Each pair of Pairs is compared once, so cyclic structures terminate.
+
+        >>> s, t = Pair(1, nil), Pair(1, nil)
+        >>> s.second, t.second = s, t
+        >>> s == t, s == Pair(1, Pair(1, nil))
+        (True, False)
+        """
         if not isinstance(p, Pair):
             return False
-        return self.first == p.first and self.second == p.second
+        pending, compared = [(self, p)], set()
+        while pending:
+            x, y = pending.pop()
+            while isinstance(x, Pair) and isinstance(y, Pair):
+                if (id(x), id(y)) in compared:
+                    break
+                compared.add((id(x), id(y)))
+                pending.append((x.first, y.first))
+                x, y = x.second, y.second
+            else:
+                if isinstance(x, Pair) or isinstance(y, Pair) or x != y:
+                    return False
+        return True
 
     def map(self, fn):
         """Return a Scheme list after mapping Python function FN to SELF."""
-        mapped = fn(self.first)
-        if self.second is nil or isinstance(self.second, Pair):
-            return Pair(mapped, self.second.map(fn))
-        else:
+        mapped, p = [], self
+        while isinstance(p, Pair):
+            mapped.append(fn(p.first))
+            p = p.second
+        if p is not nil:
             raise TypeError("ill-formed list")
+        result = nil
+        for item in reversed(mapped):
+            result = Pair(item, result)
+        return result
 
 class nil:
     """The empty list"""
@@ -111,6 +151,42 @@ class nil:
 
 nil = nil() # Assignment hides the nil class; there is only one instance
 
+class FrozenPair(Pair):
+    """A Pair whose elements cannot be changed, so that it can be shared.
+
+    >>> s = FrozenPair(1, nil)
+    >>> s
+    Pair(1, nil)
+    >>> s.first = 2
+    Traceback (most recent call last):
+        ...
+    AttributeError: cannot change a frozen pair
+    """
+    def __init__(self, first, second):
+        object.__setattr__(self, 'first', first)
+        object.__setattr__(self, 'second', second)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("cannot change a frozen pair")
+
+def freeze(expr):
+    """Return EXPR with each of its Pairs replaced by a FrozenPair.
+
+    >>> s = freeze(Pair(1, Pair(Pair(2, nil), 3)))
+    >>> s, isinstance(s.second.first, FrozenPair)
+    (Pair(1, Pair(Pair(2, nil), 3)), True)
+    """
+    if not isinstance(expr, Pair) or isinstance(expr, FrozenPair):
+        return expr
+    items = []
+    while isinstance(expr, Pair) and not isinstance(expr, FrozenPair):
+        items.append(freeze(expr.first))
+        expr = expr.second
+    expr = freeze(expr)
+    for item in reversed(items):
+        expr = FrozenPair(item, expr)
+    return expr
+
 # Scheme list parser
 
 
@@ -175,12 +251,45 @@ def read_tail(src):
                 return second                                       # Return the value of the second element
             raise SyntaxError('Expected one element after .')       # Raise an error if there is another value after second
         else:
+            line = len(src.lines)
             first = scheme_read(src)
             rest = read_tail(src)
-            return Pair(first, rest)
+            pair = Pair(first, rest)
+            if SOURCE_LOCATIONS is not None and src.filename:
+                SOURCE_LOCATIONS[id(pair)] = (pair, src.filename, line)
+            return pair
     except EOFError:
         raise SyntaxError("unexpected end of file")
 
+# Source locations
+
+# While source locations are recorded, maps the id of each Pair read from a
+# file to the Pair, the file name, and the line on which it starts.  Pairs are
+# kept alive by the table so that their ids are not reused.
+SOURCE_LOCATIONS = None
+
+def record_source_locations(enable=True):
+    """Start (or stop) recording the source locations of Pairs read from files.
+
+    >>> record_source_locations()
+    >>> src = Buffer(tokenize_lines(["(define (f x)", "  (g x))"]), "f.scm")
+    >>> expr = scheme_read(src)
+    >>> source_location(expr), source_location(expr.second.second.first)
+    (('f.scm', 1), ('f.scm', 2))
+    >>> record_source_locations(False)
+    >>> source_location(expr) is None
+    True
+    """
+    global SOURCE_LOCATIONS
+    SOURCE_LOCATIONS = {} if enable else None
+
+def source_location(pair):
+    """Return the file name and line number of PAIR, or None if unknown."""
+    entry = SOURCE_LOCATIONS and SOURCE_LOCATIONS.get(id(pair))
+    if entry and entry[0] is pair:
+        return entry[1:]
+    return None
+
 # Convenience methods
 
 def buffer_input(prompt="scm> "):
@@ -195,9 +304,42 @@ def buffer_lines(lines, prompt="scm> ", show_prompt=False):
         input_lines = LineReader(lines, prompt)
     return Buffer(tokenize_lines(input_lines))
 
+READ_CACHE_SIZE = 1024 # Number of texts whose expressions each reader keeps
+
+@lru_cache(maxsize=READ_CACHE_SIZE)
 def read_line(line):
-    """Read a single string LINE as a Scheme expression."""
-    return scheme_read(Buffer(tokenize_lines([line])))
+    """Read a single string LINE as a Scheme expression.
+
+    The expressions of recently read lines are cached, so reading the same
+    text again returns the same expression, which is frozen so that it can be
+    shared.  Hit rates are reported by read_line.cache_info().
+
+    >>> read_line("(f (g 1))") is read_line("(f (g 1))")
+    True
+    >>> read_line.cache_info().maxsize == READ_CACHE_SIZE
+    True
+    """
+    return freeze(scheme_read(Buffer(tokenize_lines([line]))))
+
+@lru_cache(maxsize=READ_CACHE_SIZE)
+def read_text(text):
+    """Read every Scheme expression in the string TEXT, which may span many
+    lines, and return them as a tuple.  Like read_line, it caches the frozen
+    expressions of recently read texts.
+
+    >>> read_text("(define x 1)\\n(+ x 2) 'y")
+    (Pair('define', Pair('x', Pair(1, nil))), Pair('+', Pair('x', Pair(2, nil))), Pair('quote', Pair('y', nil)))
+    >>> read_text("(f 1) (g 2)") is read_text("(f 1) (g 2)")
+    True
+    """
+    src = Buffer(tokenize_lines(text.split('\n')))
+    exprs = []
+    try:
+        while True:
+            exprs.append(freeze(scheme_read(src)))
+    except EOFError:
+        pass
+    return tuple(exprs)
 
 # Interactive loop
 
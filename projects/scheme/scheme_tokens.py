@@ -2,7 +2,7 @@
 for converting (iterators producing) strings into (iterators producing) lists
 of tokens.  A token may be:
 
-  * A number (represented as an int or float)
+  * A number (represented as an int, float, or Fraction)
   * A boolean (represented as a bool)
   * A symbol (represented as a string)
   * A delimiter, including parentheses, dots, and single quotes
@@ -13,9 +13,12 @@ in the course, such as quasiquoting and Scheme strings.
 
 from ucb import main
 import itertools
+import re
 import string
 import sys
+import time
 import tokenize
+from fractions import Fraction
 
 _NUMERAL_STARTS = set(string.digits) | set('+-.')
 _SYMBOL_CHARS = (set('!$%&*/:<=>?@^_~') | set(string.ascii_lowercase) |
@@ -73,44 +76,127 @@ def next_candidate_token(line, k):
             return line[k:j], min(j, len(line))
     return None, len(line)
 
+# A regular expression that matches the next token or comment in a line,
+# after any whitespace.  The name of the group that matched classifies the
+# token, so that common tokens are converted directly.  Other candidate tokens
+# are classified by _append_token.  Symbols and numerals must be followed by a
+# character that ends a token (the {end} lookahead).
+_TOKEN_RE = re.compile(r'''
+    [\ \t\n\r]*
+    (?:
+      (?P<delimiter>[()'`]|,@?)
+    | (?P<symbol>[a-zA-Z!$%&*/:<=>?@^_~][a-zA-Z0-9!$%&*/:<=>?@^_~+\-.]*){end}
+    | (?P<int>[+-]?[0-9]+){end}
+    | (?P<float>[+-]?(?:[0-9]+\.[0-9]*|\.[0-9]+|[0-9]+)(?:[eE][+-]?[0-9]+)?){end}
+    | (?P<bracket>[\[\]])
+    | (?P<string>"[^\n"\\]*(?:\\.[^\n"\\]*)*")
+    | (?P<comment>;)
+    | (?P<other>\#(?s:.)?|"|[^;\#,\ \t\n\r()\[\]'`"][^,\ \t\n\r()\[\]'`"]*)
+    )
+'''.format(end=r'''(?=[\ \t\n\r()\[\]'`",]|\Z)'''), re.VERBOSE)
+
+# Tokens that might be read as numbers by int or float without a digit
+_MAYBE_NUMERAL = re.compile('[0-9]|inf|nan', re.IGNORECASE)
+
+# Symbols that are read as other values
+_SPECIAL_SYMBOLS = {'true': True, 'false': False}
+
 def tokenize_line(line):
-    """The list of Scheme tokens on line.  Excludes comments and whitespace."""
+    """The list of Scheme tokens on line.  Excludes comments and whitespace.
+
+    >>> tokenize_line("(define (f x) [* -1/2 x 2.5 1e3]) ; comment")
+    ['(', 'define', '(', 'f', 'x', ')', '(', '*', Fraction(-1, 2), 'x', 2.5, 1000.0, ')', ')']
+    >>> tokenize_line('`(#t ,@x #f "a b" . True nil)')
+    ['`', '(', True, ',@', 'x', False, '"a b"', '.', True, 'nil', ')']
+    """
     result = []
-    text, i = next_candidate_token(line, 0)
-    while text is not None:
-        if text in DELIMITERS:
-            result.append(text)
-        elif text == '#t' or text.lower() == 'true':
-            result.append(True)
-        elif text == '#f' or text.lower() == 'false':
-            result.append(False)
-        elif text == 'nil':
-            result.append(text)
-        elif text[0] in _SYMBOL_CHARS:
-            number = False
-            if text[0] in _NUMERAL_STARTS:
+    i = 0
+    while i is not None:
+        i = _scan(line, i, result)
+    return result
+
+def _scan(line, i, result):
+    """Append the tokens of LINE from position I to RESULT.  Return None at
+    the end of the line, or a position from which to continue scanning."""
+    append = result.append
+    for token in _TOKEN_RE.finditer(line, i):
+        kind = token.lastgroup
+        if kind == 'delimiter':
+            append(token[kind])
+        elif kind == 'symbol':
+            text = token[kind].lower()
+            append(_SPECIAL_SYMBOLS.get(text, text))
+        elif kind == 'int':
+            append(int(token[kind]))
+        elif kind == 'float':
+            append(float(token[kind]))
+        elif kind == 'bracket':
+            append('(' if token[kind] == '[' else ')')
+        elif kind == 'string':
+            append(token[kind])
+        elif kind == 'comment':
+            return None
+        else:
+            text, end = token[kind], token.end()
+            if text == '"':
+                text, end = next_candidate_token(line, token.start(kind))
+                _append_token(result, text, line, end)
+                return end
+            _append_token(result, text, line, end)
+    return None
+
+def _append_token(result, text, line, i):
+    """Append to RESULT the token represented by the candidate TEXT, which
+    ends at position I of LINE."""
+    if text in DELIMITERS:
+        result.append(text)
+    elif text == '#t' or text.lower() == 'true':
+        result.append(True)
+    elif text == '#f' or text.lower() == 'false':
+        result.append(False)
+    elif text == 'nil':
+        result.append(text)
+    elif text[0] in _SYMBOL_CHARS:
+        number = False
+        if text[0] in _NUMERAL_STARTS and _MAYBE_NUMERAL.search(text):
+            try:
+                result.append(int(text))
+                number = True
+            except ValueError:
                 try:
-                    result.append(int(text))
+                    result.append(float(text))
                     number = True
                 except ValueError:
-                    try:
-                        result.append(float(text))
-                        number = True
-                    except ValueError:
-                        pass
-            if not number:
-                if valid_symbol(text):
-                    result.append(text.lower())
-                else:
-                    raise ValueError("invalid numeral or symbol: {0}".format(text))
-        elif text[0] in _STRING_DELIMS:
-            result.append(text)
-        else:
-            print("warning: invalid token: {0}".format(text), file=sys.stderr)
-            print("    ", line, file=sys.stderr)
-            print(" " * (i+3), "^", file=sys.stderr)
-        text, i = next_candidate_token(line, i)
-    return result
+                    if '/' in text:
+                        try:
+                            result.append(rational(text))
+                            number = True
+                        except (ValueError, ZeroDivisionError):
+                            pass
+        if not number:
+            if valid_symbol(text):
+                result.append(text.lower())
+            else:
+                raise ValueError("invalid numeral or symbol: {0}".format(text))
+    elif text[0] in _STRING_DELIMS:
+        result.append(text)
+    else:
+        print("warning: invalid token: {0}".format(text), file=sys.stderr)
+        print("    ", line, file=sys.stderr)
+        print(" " * (i+3), "^", file=sys.stderr)
+
+def rational(text):
+    """Return the exact rational number written as TEXT, such as 1/3, as a
+    Fraction, or as an int if its denominator is 1.
+
+    >>> rational('2/6')
+    Fraction(1, 3)
+    >>> rational('-4/2')
+    -2
+    """
+    numerator, denominator = text.split('/')
+    value = Fraction(int(numerator), int(denominator))
+    return value.numerator if value.denominator == 1 else value
 
 def tokenize_lines(input):
     """An iterator over lists of tokens, one for each line of the iterable
@@ -122,9 +208,26 @@ def count_tokens(input):
     return len(list(filter(lambda x: x not in DELIMITERS,
                            itertools.chain(*tokenize_lines(input)))))
 
+def bench_tokens(lines, min_time=1.0):
+    """Tokenize LINES repeatedly for at least MIN_TIME seconds and return
+    the number of tokens tokenized per second."""
+    count, start, elapsed = 0, time.perf_counter(), 0
+    while elapsed < min_time:
+        for line in lines:
+            count += len(tokenize_line(line))
+        elapsed = time.perf_counter() - start
+    return count / elapsed
+
 @main
 def run(*args):
+    bench = args[:1] == ('--bench',)
+    if bench:
+        args = args[1:]
     file = sys.stdin
     if args:
         file = open(args[0], 'r')
-    print('counted', count_tokens(file), 'non-delimiter tokens')
+    if bench:
+        rate = bench_tokens(file.readlines())
+        print('tokenized {0:.0f} tokens per second'.format(rate))
+    else:
+        print('counted', count_tokens(file), 'non-delimiter tokens')
@@ -0,0 +1,189 @@
+"""The scheme_trace module records a timeline of procedure calls and
+allocations in the Chrome trace event format.
+
+A Tracer replaces the scheme_apply and apply_primitive functions of an
+interpreter module with wrappers that record a begin ("B") event and an end
+("E") event around each call, named after the global name of the procedure.
+Compound procedures whose bodies are evaluated in place by the tail-recursive
+evaluator are reported to the Tracer through the call_tracer of the
+interpreter, and end when the next tail call replaces them or when the
+evaluation that called them returns.  The
+Tracer also counts the Pairs and Frames that are allocated, and records their
+totals as counter ("C") events alongside each call.  The resulting file can be
+opened in chrome://tracing or https://ui.perfetto.dev.
+
+To bound the overhead and size of a trace, only one in every SAMPLE calls is
+recorded, and recording stops after MAX_EVENTS events.  Events for the calls
+that are recorded remain properly nested.
+"""
+
+import json
+import os
+import time
+from scheme_primitives import PrimitiveProcedure
+from scheme_reader import Pair
+
+MAX_EVENTS = 1000000 # Events recorded before a trace is truncated
+
+class Tracer:
+    """Traces calls in the interpreter module INTERPRETER, recording one in
+    every SAMPLE calls.
+
+    >>> import scheme
+    >>> env = scheme.create_global_frame()
+    >>> tracer = Tracer(scheme)
+    >>> with tracer:
+    ...     scheme.scheme_eval(scheme.read_line("(define (f x) (* x x))"), env)
+    ...     scheme.scheme_eval(scheme.read_line("(f (f 3))"), env)
+    'f'
+    81
+    >>> [(e['ph'], e['name']) for e in tracer.events if e['ph'] != 'C']
+    [('B', 'f'), ('B', '*'), ('E', '*'), ('E', 'f'), ('B', 'f'), ('B', '*'), ('E', '*'), ('E', 'f')]
+    >>> scheme.scheme_apply is tracer.scheme_apply
+    True
+
+    Calls that the tail-recursive evaluator makes in place follow each other
+    instead of nesting.
+
+    >>> with Tracer(scheme) as tracer:
+    ...     scheme.scheme_eval(scheme.read_line(
+    ...         "(define (loop n) (if (= n 0) 'done (loop (- n 1))))"), env)
+    ...     scheme.scheme_eval(scheme.read_line("(loop 2)"), env)
+    'loop'
+    'done'
+    >>> [(e['ph'], e['name']) for e in tracer.events
+    ...  if e['ph'] != 'C' and e['name'] == 'loop']
+    [('B', 'loop'), ('E', 'loop'), ('B', 'loop'), ('E', 'loop'), ('B', 'loop'), ('E', 'loop')]
+    """
+
+    def __init__(self, interpreter, sample=1):
+        self.interpreter = interpreter
+        self.sample = sample
+        self.scheme_apply = interpreter.scheme_apply
+        self.apply_primitive = interpreter.apply_primitive
+        self.scheme_eval = interpreter.scheme_optimized_eval
+        self.events = []
+        self.stack = []    # Names of the calls in progress, or None if skipped
+        self.calls = 0     # Calls seen
+        self.pairs = 0     # Pairs allocated
+        self.frames = 0    # Frames allocated
+        self.names = {}    # id(procedure) -> (procedure, name)
+        self.start_time = None
+
+    # Installing
+
+    def install(self):
+        interpreter = self.interpreter
+        self.start_time = time.perf_counter()
+        interpreter.call_tracer = self
+        interpreter.scheme_apply = self.traced(self.scheme_apply, False)
+        interpreter.apply_primitive = self.traced(self.apply_primitive, True)
+        interpreter.scheme_eval = interpreter.scheme_optimized_eval = \
+            self.traced_eval(self.scheme_eval)
+        self.pair_init = Pair.__init__
+        self.frame_init = interpreter.Frame.__init__
+        Pair.__init__ = self.counted(self.pair_init, 'pairs')
+        interpreter.Frame.__init__ = self.counted(self.frame_init, 'frames')
+
+    def uninstall(self):
+        interpreter = self.interpreter
+        interpreter.call_tracer = None
+        interpreter.scheme_apply = self.scheme_apply
+        interpreter.apply_primitive = self.apply_primitive
+        interpreter.scheme_eval = interpreter.scheme_optimized_eval = \
+            self.scheme_eval
+        Pair.__init__ = self.pair_init
+        interpreter.Frame.__init__ = self.frame_init
+        self.end(0)
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.uninstall()
+
+    def counted(self, init, counter):
+        """Wrap the __init__ method INIT to count instances in COUNTER."""
+        def __init__(obj, *args):
+            setattr(self, counter, getattr(self, counter) + 1)
+            init(obj, *args)
+        return __init__
+
+    # Recording
+
+    def traced(self, apply, primitives):
+        """Wrap APPLY, a function of a procedure, arguments, and environment,
+        to record calls.  Only primitive calls are recorded if PRIMITIVES, and
+        only others otherwise, so that no call is recorded twice."""
+        def traced_apply(procedure, args, env):
+            if isinstance(procedure, PrimitiveProcedure) != primitives:
+                return apply(procedure, args, env)
+            depth = self.enter(procedure, env)
+            try:
+                return apply(procedure, args, env)
+            finally:
+                self.end(depth)
+        return traced_apply
+
+    def traced_eval(self, evaluate):
+        """Wrap EVALUATE, a function of an expression and an environment, to
+        end the calls entered while it evaluates the expression in place."""
+        def traced_eval(expr, env):
+            depth = len(self.stack)
+            try:
+                return evaluate(expr, env)
+            finally:
+                if len(self.stack) > depth:
+                    self.end(depth)
+        return traced_eval
+
+    def enter(self, procedure, env):
+        """Begin a call to PROCEDURE from ENV and return the depth of the
+        calls in progress before it."""
+        depth = len(self.stack)
+        self.calls += 1
+        if self.calls % self.sample == 0 and len(self.events) < MAX_EVENTS:
+            name = self.name(procedure, env)
+            self.record('B', name)
+            self.stack.append(name)
+        else:
+            self.stack.append(None)
+        return depth
+
+    def end(self, depth):
+        """End the calls in progress above DEPTH."""
+        while len(self.stack) > depth:
+            name = self.stack.pop()
+            if name is not None:
+                self.record('E', name)
+
+    def record(self, phase, name):
+        ts = (time.perf_counter() - self.start_time) * 1e6
+        pid = os.getpid()
+        self.events.append({'name': name, 'ph': phase, 'ts': ts,
+                            'pid': pid, 'tid': 0})
+        if phase == 'B':
+            self.events.append({'name': 'allocations', 'ph': 'C', 'ts': ts,
+                                'pid': pid, 'tid': 0,
+                                'args': {'pairs': self.pairs,
+                                         'frames': self.frames}})
+
+    def name(self, procedure, env):
+        """The global name of PROCEDURE, or its text if it has none."""
+        entry = self.names.get(id(procedure))
+        if entry is None or entry[0] is not procedure:
+            for name, value in env.global_frame().bindings.items():
+                if value is procedure:
+                    break
+            else:
+                name = str(procedure)
+                if len(name) > 40:
+                    name = name[:37] + '...'
+            entry = self.names[id(procedure)] = (procedure, name)
+        return entry[1]
+
+    def save(self, filename):
+        """Write the recorded events to FILENAME as a Chrome trace."""
+        with open(filename, 'w') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
@@ -0,0 +1,298 @@
+"""The scheme_turtle module implements a headless turtle graphics backend.
+
+A RecordingTurtle provides the functions of the turtle module that the Scheme
+turtle primitives use.  Instead of animating a Tk window, it tracks the
+turtle's position and records each line and filled shape in a command list.
+When the program ends, the recorded drawing is rendered in one pass to an SVG
+file, or rasterized to a PPM or PNG image without any external libraries.
+
+Coordinates follow the turtle module in logo mode: the turtle starts at the
+origin facing north, and headings are measured clockwise from north.
+"""
+
+import math
+import struct
+import zlib
+
+# Colors that can be named in a drawing rendered as a raster image.
+_COLORS = {
+    'black': (0, 0, 0), 'white': (255, 255, 255), 'red': (255, 0, 0),
+    'green': (0, 128, 0), 'blue': (0, 0, 255), 'yellow': (255, 255, 0),
+    'orange': (255, 165, 0), 'purple': (128, 0, 128), 'brown': (165, 42, 42),
+    'pink': (255, 192, 203), 'gray': (128, 128, 128), 'grey': (128, 128, 128),
+    'cyan': (0, 255, 255), 'magenta': (255, 0, 255),
+}
+
+def parse_color(color):
+    """Return the (red, green, blue) components of COLOR, a color name or a
+    hexadecimal string such as '#ffc0c0'.  Unknown names are black.
+
+    >>> parse_color('#ffc0c0')
+    (255, 192, 192)
+    >>> parse_color('Red')
+    (255, 0, 0)
+    """
+    color = color.strip().lower()
+    if color.startswith('#') and len(color) == 7:
+        return tuple(int(color[i:i+2], 16) for i in (1, 3, 5))
+    if color.startswith('#') and len(color) == 4:
+        return tuple(17 * int(c, 16) for c in color[1:])
+    return _COLORS.get(color, (0, 0, 0))
+
+class RecordingTurtle:
+    """A turtle that records what it draws.
+
+    >>> t = RecordingTurtle()
+    >>> t.forward(10)
+    >>> t.right(90)
+    >>> t.forward(5)
+    >>> t.commands
+    [('line', 0.0, 0.0, 0.0, 10.0, 'black'), ('line', 0.0, 10.0, 5.0, 10.0, 'black')]
+    """
+
+    def __init__(self):
+        self.commands = []
+        self.x, self.y = 0.0, 0.0
+        self.angle = 90.0 # Counterclockwise from east, in degrees
+        self.pen = True
+        self.pen_color = self.fill_color = 'black'
+        self.fill_start = None
+        self.fill_points = None
+
+    # Turtle state
+
+    def title(self, title):
+        pass
+
+    def mode(self, mode):
+        pass
+
+    def speed(self, s):
+        pass
+
+    def showturtle(self):
+        pass
+
+    def hideturtle(self):
+        pass
+
+    def exitonclick(self):
+        pass
+
+    def penup(self):
+        self.pen = False
+
+    def pendown(self):
+        self.pen = True
+
+    def color(self, c):
+        self.pen_color = self.fill_color = c
+
+    def clear(self):
+        self.commands = []
+        if self.fill_points is not None:
+            self.fill_start = 0
+
+    # Movement
+
+    def left(self, n):
+        self.angle = (self.angle + n) % 360
+
+    def right(self, n):
+        self.left(-n)
+
+    def setheading(self, h):
+        self.angle = (90 - h) % 360
+
+    def forward(self, n):
+        a = math.radians(self.angle)
+        self.goto(self.x + n * math.cos(a), self.y + n * math.sin(a))
+
+    def backward(self, n):
+        self.forward(-n)
+
+    def setposition(self, x, y):
+        self.goto(float(x), float(y))
+
+    def goto(self, x, y):
+        """Move to (X, Y), drawing a line if the pen is down."""
+        x, y = round(x, 10) + 0.0, round(y, 10) + 0.0
+        if self.pen:
+            self.commands.append(('line', self.x, self.y, x, y, self.pen_color))
+        if self.fill_points is not None:
+            self.fill_points.append((x, y))
+        self.x, self.y = x, y
+
+    def circle(self, r, extent=None):
+        """Draw an arc of radius R through EXTENT degrees (default 360) as a
+        sequence of short lines, as the turtle module does."""
+        if extent is None:
+            extent = 360
+        frac = abs(extent) / 360
+        steps = 1 + int(min(11 + abs(r) / 6, 59) * frac)
+        w = extent / steps
+        length = 2 * r * math.sin(math.radians(w / 2))
+        if r < 0:
+            length, w = -length, -w
+        self.left(w / 2)
+        for _ in range(steps):
+            self.forward(length)
+            self.left(w)
+        self.left(-w / 2)
+
+    # Filling
+
+    def begin_fill(self):
+        self.fill_start = len(self.commands)
+        self.fill_points = [(self.x, self.y)]
+
+    def end_fill(self):
+        if self.fill_points is not None and len(self.fill_points) > 2:
+            fill = ('fill', tuple(self.fill_points), self.fill_color)
+            self.commands.insert(self.fill_start, fill)
+        self.fill_start = self.fill_points = None
+
+    # Rendering
+
+    def save(self, filename, width=800, height=800):
+        """Render the drawing to FILENAME, choosing SVG, PNG, or PPM output
+        from its extension.  The origin is at the center of the image."""
+        if filename.endswith('.svg'):
+            with open(filename, 'w') as f:
+                f.write(self.to_svg(width, height))
+            return
+        canvas = Canvas(width, height)
+        canvas.draw(self.commands)
+        with open(filename, 'wb') as f:
+            if filename.endswith('.png'):
+                f.write(canvas.to_png())
+            else:
+                f.write(canvas.to_ppm())
+
+    def to_svg(self, width=800, height=800):
+        """Return the drawing as the text of an SVG document."""
+        lines = ['<svg xmlns="http://www.w3.org/2000/svg" width="{0}" '
+                 'height="{1}" viewBox="{2} {3} {0} {1}">'.format(
+                     width, height, -width / 2, -height / 2),
+                 '<rect x="{0}" y="{1}" width="{2}" height="{3}" '
+                 'fill="white"/>'.format(-width / 2, -height / 2,
+                                         width, height),
+                 '<g transform="scale(1,-1)" stroke-width="1" '
+                 'stroke-linecap="round">']
+        path, color = [], None
+        def end_path():
+            if path:
+                lines.append('<path d="{0}" stroke="{1}" fill="none"/>'.format(
+                    ' '.join(path), color))
+                path.clear()
+        position = None
+        for command in self.commands:
+            if command[0] == 'fill':
+                end_path()
+                points = ' '.join('{0:g},{1:g}'.format(x, y)
+                                  for x, y in command[1])
+                lines.append('<polygon points="{0}" fill="{1}"/>'.format(
+                    points, command[2]))
+                position = None
+                continue
+            _, x0, y0, x1, y1, c = command
+            if c != color:
+                end_path()
+                color, position = c, None
+            if position != (x0, y0):
+                path.append('M{0:g},{1:g}'.format(x0, y0))
+            path.append('L{0:g},{1:g}'.format(x1, y1))
+            position = (x1, y1)
+        end_path()
+        lines.extend(['</g>', '</svg>', ''])
+        return '\n'.join(lines)
+
+class Canvas:
+    """A WIDTH by HEIGHT RGB raster image with a white background, on which
+    turtle drawing commands are rasterized.
+
+    >>> canvas = Canvas(5, 5)
+    >>> canvas.draw([('line', -2, 0, 2, 0, 'red')])
+    >>> canvas.pixel(0, 2), canvas.pixel(4, 2), canvas.pixel(2, 0)
+    ((255, 0, 0), (255, 0, 0), (255, 255, 255))
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.pixels = bytearray(b'\xff' * (3 * width * height))
+
+    def pixel(self, col, row):
+        i = 3 * (row * self.width + col)
+        return tuple(self.pixels[i:i+3])
+
+    def to_image(self, x, y):
+        """Return the column and row of turtle coordinates (X, Y)."""
+        return round(x + self.width // 2), round(self.height // 2 - y)
+
+    def draw(self, commands):
+        for command in commands:
+            if command[0] == 'line':
+                _, x0, y0, x1, y1, color = command
+                self.line(self.to_image(x0, y0), self.to_image(x1, y1),
+                          bytes(parse_color(color)))
+            else:
+                _, points, color = command
+                self.polygon([self.to_image(x, y) for x, y in points],
+                             bytes(parse_color(color)))
+
+    def line(self, start, end, rgb):
+        """Draw a line from START to END with Bresenham's algorithm."""
+        (c0, r0), (c1, r1) = start, end
+        dc, dr = abs(c1 - c0), -abs(r1 - r0)
+        sc, sr = (1 if c0 < c1 else -1), (1 if r0 < r1 else -1)
+        err = dc + dr
+        width, height, pixels = self.width, self.height, self.pixels
+        while True:
+            if 0 <= c0 < width and 0 <= r0 < height:
+                i = 3 * (r0 * width + c0)
+                pixels[i:i+3] = rgb
+            if c0 == c1 and r0 == r1:
+                return
+            e2 = 2 * err
+            if e2 >= dr:
+                err += dr
+                c0 += sc
+            if e2 <= dc:
+                err += dc
+                r0 += sr
+
+    def polygon(self, points, rgb):
+        """Fill the polygon with vertices POINTS using the even-odd rule."""
+        edges = list(zip(points, points[1:] + points[:1]))
+        top = max(0, min(r for _, r in points))
+        bottom = min(self.height - 1, max(r for _, r in points))
+        for row in range(top, bottom + 1):
+            y = row + 0.5
+            crossings = sorted(c0 + (y - r0) * (c1 - c0) / (r1 - r0)
+                               for (c0, r0), (c1, r1) in edges
+                               if (r0 <= y) != (r1 <= y))
+            for left, right in zip(crossings[::2], crossings[1::2]):
+                start = max(0, math.ceil(left - 0.5))
+                end = min(self.width, math.floor(right - 0.5) + 1)
+                if start < end:
+                    i = 3 * (row * self.width)
+                    self.pixels[i + 3*start:i + 3*end] = rgb * (end - start)
+
+    def to_ppm(self):
+        """Return the image as the contents of a binary PPM file."""
+        header = 'P6\n{0} {1}\n255\n'.format(self.width, self.height)
+        return header.encode('ascii') + bytes(self.pixels)
+
+    def to_png(self):
+        """Return the image as the contents of a PNG file."""
+        def chunk(kind, data):
+            body = kind + data
+            return (struct.pack('>I', len(data)) + body +
+                    struct.pack('>I', zlib.crc32(body) & 0xffffffff))
+        stride = 3 * self.width
+        raw = b''.join(b'\x00' + bytes(self.pixels[i:i+stride])
+                       for i in range(0, len(self.pixels), stride))
+        header = struct.pack('>IIBBBBB', self.width, self.height, 8, 2, 0, 0, 0)
+        return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) +
+                chunk(b'IDAT', zlib.compress(raw, 6)) + chunk(b'IEND', b''))
@@ -0,0 +1,183 @@
+"""The scheme_watch module implements watch mode for the Scheme interpreter.
+
+A Watcher loads Scheme source files into an environment and remembers the
+top-level forms that each file contained, along with the lines on which they
+appeared.  When a file changes on disk, the watcher reads it again and
+evaluates only the top-level forms whose contents changed.  Definitions that
+were removed from the file are removed from the environment.
+
+Forms are compared by a hash of their printed representation, so edits to
+whitespace and comments do not cause any re-evaluation.
+"""
+
+import hashlib
+import os
+from collections import Counter
+from buffer import Buffer
+from scheme_primitives import SchemeError, scheme_symbolp
+from scheme_reader import Pair, scheme_read
+from scheme_tokens import tokenize_lines
+
+class TopLevelForm:
+    """A top-level expression EXPR read from lines START to END of a file.
+
+    >>> form = read_forms(["(define (f x)", "  (* x x))"])[0]
+    >>> form.name, form.start, form.end
+    ('f', 1, 2)
+    """
+
+    def __init__(self, expr, start, end):
+        self.expr = expr
+        self.start = start
+        self.end = end
+        self.key = hashlib.sha1(repr(expr).encode('utf-8')).hexdigest()
+        self.name = defined_name(expr)
+
+    def __str__(self):
+        if self.start == self.end:
+            return 'line {0}'.format(self.start)
+        return 'lines {0}-{1}'.format(self.start, self.end)
+
+def defined_name(expr):
+    """Return the symbol bound by EXPR if it is a define form, or None.
+
+    >>> defined_name(read_forms(["(define x 2)"])[0].expr)
+    'x'
+    >>> defined_name(read_forms(["(display x)"])[0].expr) is None
+    True
+    """
+    if not (isinstance(expr, Pair) and expr.first == 'define' and
+            isinstance(expr.second, Pair)):
+        return None
+    target = expr.second.first
+    if isinstance(target, Pair):
+        target = target.first
+    return target if scheme_symbolp(target) else None
+
+def read_forms(lines):
+    """Return a list of the TopLevelForms in LINES, an iterable of strings.
+
+    >>> [str(form) for form in read_forms(["(define a 1) (define b 2)", "",
+    ...                                    "(define (c)", "  3)"])]
+    ['line 1', 'line 1', 'lines 3-4']
+    """
+    src = Buffer(tokenize_lines(line.rstrip('\n') for line in lines))
+    forms = []
+    while src.current() is not None:
+        start = len(src.lines)
+        expr = scheme_read(src)
+        forms.append(TopLevelForm(expr, start, len(src.lines)))
+    return forms
+
+class WatchedFile:
+    """The last successfully read contents of a watched source file."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.mtime = None
+        self.forms = []
+
+    def stat(self):
+        """Return the modification time of the file, or None if missing."""
+        try:
+            return os.stat(self.filename).st_mtime_ns
+        except OSError:
+            return None
+
+class Watcher:
+    """Loads files into the environment ENV with EVALUATE, a function of an
+    expression and an environment, and re-evaluates changed top-level forms
+    each time poll is called."""
+
+    def __init__(self, env, evaluate, quiet=False):
+        self.env = env
+        self.evaluate = evaluate
+        self.quiet = quiet
+        self.files = []
+
+    def load(self, filename):
+        """Evaluate all forms in FILENAME and watch it for changes."""
+        watched = WatchedFile(filename)
+        self.files.append(watched)
+        self.refresh(watched, initial=True)
+
+    def poll(self):
+        """Re-evaluate the changed forms of any watched file that has been
+        modified since it was last read.  Return the changed forms."""
+        changed = []
+        for watched in self.files:
+            if watched.stat() != watched.mtime:
+                changed.extend(self.refresh(watched))
+        return changed
+
+    def refresh(self, watched, initial=False):
+        """Read WATCHED again, evaluating the forms that are new or changed
+        and undefining names whose definitions were removed.  Changes are
+        reported unless this is the INITIAL load of the file.
+
+        When a removed definition's name is still defined by other forms, the
+        last of them is evaluated again.
+
+        >>> import os, tempfile, scheme
+        >>> env = scheme.create_global_frame()
+        >>> watcher = Watcher(env, scheme.scheme_eval, quiet=True)
+        >>> filename = os.path.join(tempfile.mkdtemp(), 'defs.scm')
+        >>> def save(text):
+        ...     with open(filename, 'w') as f:
+        ...         _ = f.write(text)
+        >>> save("(define (f x) (+ x 1))\\n(define z (f 1))\\n(define z 9)\\n")
+        >>> watcher.load(filename)
+        >>> save("(define (f x) (+ x 1))\\n(define z (f 1))\\n")
+        >>> [str(form) for form in watcher.refresh(watcher.files[0])]
+        ['line 2']
+        >>> env.lookup('z')
+        2
+        """
+        watched.mtime = watched.stat()
+        try:
+            with open(watched.filename) as infile:
+                forms = read_forms(infile.readlines())
+        except (IOError, SyntaxError, ValueError) as err:
+            # Keep the last good contents so the next save is compared to it
+            print("Error: {0}: {1}".format(watched.filename, err))
+            return []
+
+        unmatched = Counter(form.key for form in watched.forms)
+        changed = []
+        for form in forms:
+            if unmatched[form.key]:
+                unmatched[form.key] -= 1
+            else:
+                changed.append(form)
+        last_definitions = {form.name: form for form in forms if form.name}
+        for form in watched.forms:
+            if not unmatched[form.key]:
+                continue
+            unmatched[form.key] -= 1
+            if form.name in last_definitions:
+                # The name keeps the value of its last surviving definition
+                if last_definitions[form.name] not in changed:
+                    changed.append(last_definitions[form.name])
+            elif form.name is not None and form.name in self.env.bindings:
+                self.env.undefine(form.name)
+                self.report('removed', form.name, watched, form)
+
+        watched.forms = forms
+        changed.sort(key=forms.index)
+        for form in changed:
+            try:
+                self.evaluate(form.expr, self.env)
+            except (SchemeError, SyntaxError, ValueError, RuntimeError) as err:
+                if (isinstance(err, RuntimeError) and
+                    'maximum recursion depth exceeded' not in err.args[0]):
+                    raise
+                print("Error: {0} {1}: {2}".format(watched.filename, form, err))
+                continue
+            if not initial:
+                self.report('reloaded', form.name or form.expr, watched, form)
+        return changed
+
+    def report(self, action, what, watched, form):
+        if not self.quiet:
+            print('; {0} {1} ({2}, {3})'.format(action, what,
+                                                watched.filename, form))
@@ -11,13 +11,7 @@ info = {
       import scheme
       
       def eval(snippet):
-          buf = scheme.buffer_lines(snippet.split('\n'), show_prompt=True)
-          exprs = []
-          try:
-              while True:
-                  exprs.append(scheme.scheme_read(buf))
-          except EOFError:
-              pass
+          exprs = scheme.read_text(snippet)
           env = scheme.create_global_frame()
           for expr in exprs[:-1]:
               scheme.scheme_eval(expr, env)